@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+二值化基准：旧的 convert('L').point(lambda) 路径 vs 缓存查表 vs NumPy 融合内核
+
+截图路径（RGB -> L -> 1）上缓存查表没有提速（实测 x0.97，在噪声范围内）：耗时主要在 Pillow 的
+灰度转换，查表本身只省下构建 lambda 表的开销。真正的收益在调整阈值时对内存中的灰度图重新二值化（cached L 一项）。
+NumPy 内核（直接从 BGRX 一次完成亮度与阈值并 packbits）保留在这里作对照，实测比 Pillow 慢。
+同时测量自动阈值（Otsu）和局部阈值（Sauvola）相对固定阈值的额外开销。
+
+用法:
+    python benchmarks/bench_binarize.py                  # 随机 3036x1900 区域
+    python benchmarks/bench_binarize.py --image raw.png  # 使用真实截图
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.binarize import binarize, otsu_threshold, sauvola, threshold
+
+
+def legacy(image, thresh):
+    fn = lambda x : 255 if x > thresh else 0
+    return image.convert('L').point(fn, mode='1')
+
+
+def numpy_fused(arr, thresh):
+    # 与 Pillow 相同的定点权重: L = (R*19595 + G*38470 + B*7471 + 0x8000) >> 16
+    acc = np.multiply(arr[..., 2], 19595, dtype=np.uint32)
+    tmp = np.multiply(arr[..., 1], 38470, dtype=np.uint32)
+    acc += tmp
+    np.multiply(arr[..., 0], 7471, out=tmp, dtype=np.uint32)
+    acc += tmp
+    bits = acc >= ((thresh + 1) << 16) - 0x8000
+    h, w = bits.shape
+    return Image.frombytes("1", (w, h), np.packbits(bits, axis=1).tobytes())
+
+
+def timeit(fn, repeat):
+    best = float("inf")
+    total = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        cost = time.perf_counter() - start
+        best = min(best, cost)
+        total += cost
+    return best, total / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", help="截图文件，缺省时生成随机图像")
+    parser.add_argument("--size", default="3036x1900", help="随机图像尺寸 WxH")
+    parser.add_argument("--thresh", type=int, default=180)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.image:
+        image = Image.open(args.image).convert("RGB")
+    else:
+        w, h = (int(v) for v in args.size.split("x"))
+        rng = np.random.default_rng(0)
+        image = Image.fromarray(rng.integers(0, 256, (h, w, 3), dtype=np.uint8), "RGB")
+
+    # 模拟 X11 截图的原始 BGRX 缓冲区
+    bgrx = image.tobytes("raw", "BGRX")
+    gray = image.convert("L")
+    bgrx_arr = np.frombuffer(bgrx, dtype=np.uint8).reshape(image.size[1], image.size[0], 4)
+
+    expected = legacy(image, args.thresh).tobytes()
+    assert binarize(image, args.thresh).tobytes() == expected
+    assert binarize(gray, args.thresh).tobytes() == expected
+    assert numpy_fused(bgrx_arr, args.thresh).tobytes() == expected
+
+    cases = [
+        ("legacy convert+lambda", lambda: legacy(image, args.thresh)),
+        ("lut (RGB image)", lambda: binarize(image, args.thresh)),
+        ("lut (cached L)", lambda: binarize(gray, args.thresh)),
+        ("numpy fused (BGRX)", lambda: numpy_fused(bgrx_arr, args.thresh)),
+        ("otsu (cached L)", lambda: threshold(gray, otsu_threshold(gray))),
+        # 新的一帧要重新计算邻域统计（copy 约 1 ms）；同一帧再次二值化时统计已缓存
+        ("sauvola (new frame)", lambda: sauvola(gray.copy())),
+        ("sauvola (same frame)", lambda: sauvola(gray)),
+    ]
+
+    print(f"region {image.size[0]}x{image.size[1]}, thresh={args.thresh}, repeat={args.repeat}")
+    base = None
+    for name, fn in cases:
+        best, mean = timeit(fn, args.repeat)
+        base = base or mean
+        print(f"{name:<24} best {best * 1000:7.2f} ms  mean {mean * 1000:7.2f} ms  x{base / mean:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
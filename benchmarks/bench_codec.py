@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+帧编码基准：在一组截图区域上比较各个编码器的编码耗时和字节数
+
+用法:
+    python benchmarks/bench_codec.py --corpus ~/eink-corpus           # 目录中的截图
+    python benchmarks/bench_codec.py --capture 10                      # 现场截取 10 个区域
+    python benchmarks/bench_codec.py --corpus ~/eink-corpus --save     # 把最优编码器写入 config.toml
+
+--save 会写入 frame_codec；之后 App 直接使用它，不再在第一帧上自动测量。
+"""
+
+import os
+import sys
+import random
+import argparse
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.binarize import binarize
+from modules.codec import choose_codec, measure, score
+
+
+def load_corpus(directory, thresh):
+    images = []
+    for name in sorted(os.listdir(directory)):
+        try:
+            image = Image.open(os.path.join(directory, name))
+        except OSError:
+            continue
+        images.append(image if image.mode == "1" else binarize(image, thresh))
+    return images
+
+
+def capture_corpus(count, thresh):
+    from modules import screens
+    from modules.ScreenCapture import ScreenCapture
+    from modules.SizeManager import SizeManager
+
+    size = SizeManager()
+    capture = ScreenCapture()
+    screen_w, screen_h = screens.screen_size()
+    w, h = min(2 * size.w, screen_w), min(2 * size.h, screen_h)
+
+    images = []
+    for _ in range(count):
+        x = random.randint(0, screen_w - w)
+        y = random.randint(0, screen_h - h)
+        screen = capture.grab((x, y, x + w, y + h))
+        images.append(binarize(screen, thresh))
+        screen.close()
+    capture.close()
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="截图目录（任意 Pillow 可读格式）")
+    parser.add_argument("--capture", type=int, default=0, help="现场截取的区域数量")
+    parser.add_argument("--thresh", type=int, default=180)
+    parser.add_argument("--link-kbps", type=float, default=2000, help="到设备的带宽估计")
+    parser.add_argument("--save", action="store_true", help="把结果写入 config.toml 的 frame_codec")
+    args = parser.parse_args()
+
+    images = []
+    if args.corpus:
+        images += load_corpus(os.path.expanduser(args.corpus), args.thresh)
+    if args.capture:
+        images += capture_corpus(args.capture, args.thresh)
+    if not images:
+        sys.exit("No images: pass --corpus DIR and/or --capture N")
+
+    print(f"{len(images)} frames, link {args.link_kbps:g} kbps")
+    print(f"{'codec':<14}{'encode ms':>10}{'KiB':>10}{'total ms':>10}")
+    results = measure(images)
+    for r in sorted(results, key=lambda r: score(r, args.link_kbps)):
+        mark = "" if r["browser"] else "  (not viewable)"
+        print(f"{r['codec']:<14}{r['mean_ms']:>10.2f}{r['mean_bytes'] / 1024:>10.1f}"
+              f"{score(r, args.link_kbps):>10.2f}{mark}")
+
+    best = choose_codec(results, args.link_kbps)
+    print(f"best viewer codec: {best}")
+
+    if args.save:
+        from modules.ConfigManager import ConfigManager
+        ConfigManager().set("frame_codec", best)
+        print("saved frame_codec to config.toml")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+wire 跟随基准：旧的 10ms 轮询（getCursorInfo + configure + flush）vs 鼠标移动事件
+
+分别在鼠标静止和持续移动时测量进程 CPU 占用、唤醒次数和发出的 configure 次数。
+移动由一个子进程用 pynput 合成（每秒 --rate 次），它的 CPU 不计入本进程。
+
+用法（需要 X 桌面，无桌面时在 Xvfb 中运行）:
+    python benchmarks/bench_overlay.py
+    xvfb-run -s "-screen 0 3840x2160x24" python benchmarks/bench_overlay.py --seconds 10
+"""
+
+import os
+import sys
+import math
+import time
+import argparse
+import resource
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from Xlib import X
+from pynput import mouse
+
+from modules.mouse import getCursorInfo
+from modules.utils import throttle
+from modules.wire import createOutlineWindow
+
+
+def cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def move_pointer(seconds, rate):
+    """子进程：让鼠标绕圈移动"""
+    controller = mouse.Controller()
+    cx, cy = controller.position
+    end = time.monotonic() + seconds
+    step = 0
+    while time.monotonic() < end:
+        angle = step * 2 * math.pi / rate
+        controller.position = (int(cx + 200 * math.cos(angle)), int(cy + 200 * math.sin(angle)))
+        step += 1
+        time.sleep(1 / rate)
+
+
+def legacy_poll(wire, seconds):
+    """旧实现：每 10ms 取一次鼠标位置并无条件 configure + flush"""
+    end = time.monotonic() + seconds
+    wakeups = 0
+    while time.monotonic() < end:
+        x, y = getCursorInfo()
+        wire.window.configure(x=x - wire.w // 2, y=y - wire.h // 2, stack_mode=X.Above)
+        wire.d.flush()
+        wire.moves += 1
+        wakeups += 1
+        time.sleep(0.01)
+    return wakeups
+
+
+def events(wire, seconds):
+    """新实现：pynput 移动事件，按 60Hz 合并"""
+    wakeups = 0
+    update = throttle(1 / 60)(wire.updatePos)
+
+    def on_move(x, y):
+        nonlocal wakeups
+        wakeups += 1
+        update(x, y)
+
+    with mouse.Listener(on_move=on_move):
+        time.sleep(seconds)
+    return wakeups
+
+
+def run(name, fn, args, moving):
+    w, h = (int(v) for v in args.size.split("x"))
+    wire = createOutlineWindow(w, h)
+    mover = None
+    if moving:
+        mover = subprocess.Popen([sys.executable, __file__, "--mover",
+                                  "--seconds", str(args.seconds), "--rate", str(args.rate)])
+    try:
+        start_cpu, start = cpu_time(), time.monotonic()
+        wakeups = fn(wire, args.seconds)
+        cpu, elapsed = cpu_time() - start_cpu, time.monotonic() - start
+    finally:
+        if mover:
+            mover.wait()
+        wire.destroy()
+
+    phase = "moving" if moving else "idle"
+    print(f"{name:<8}{phase:<8}{cpu / elapsed * 100:>8.2f}{wakeups / elapsed:>12.1f}{wire.moves / elapsed:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--size", default="1800x1500", help="wire 尺寸 WxH")
+    parser.add_argument("--rate", type=int, default=200, help="合成鼠标移动的频率 (Hz)")
+    parser.add_argument("--mover", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mover:
+        move_pointer(args.seconds, args.rate)
+        return
+
+    if not os.environ.get("DISPLAY"):
+        sys.exit("DISPLAY is not set, run under xvfb-run")
+
+    print(f"{args.seconds:g}s per case, synthetic motion {args.rate} Hz")
+    print(f"{'mode':<8}{'phase':<8}{'cpu %':>8}{'wakeups/s':>12}{'configure/s':>14}")
+    for moving in (False, True):
+        run("poll", legacy_poll, args, moving)
+        run("events", events, args, moving)
+
+
+if __name__ == "__main__":
+    main()
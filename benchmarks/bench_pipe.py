@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+命令管道基准：旧的 select(0.1) + sleep(0.01) 轮询 vs PipeManager 的 epoll 监听
+
+测量三项：
+- 延迟：逐条写入 "ping <时间戳>"，处理器收到时计算耗时
+- 吞吐：一次写入大量命令，统计处理完的条数和耗时（旧实现按 1024 字节切块，会把命令切断）
+- 空闲 CPU：没有命令时监听线程的 CPU 占用
+
+用法:
+    python benchmarks/bench_pipe.py
+    python benchmarks/bench_pipe.py --pings 500 --burst 50000
+"""
+
+import os
+import sys
+import time
+import select
+import tempfile
+import argparse
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.PipeManager import PipeManager
+
+
+class LegacyPipeManager(PipeManager):
+    """原 listen_for_commands 的实现"""
+
+    def listen_for_commands(self):
+        pipe_fd = os.open(self.command_path, os.O_RDONLY | os.O_NONBLOCK)
+        try:
+            while self._listening:
+                try:
+                    ready, _, _ = select.select([pipe_fd], [], [], 0.1)
+                    if ready:
+                        data = os.read(pipe_fd, 1024).decode('utf-8')
+                        if data:
+                            for line in data.strip().split('\n'):
+                                command = line.strip()
+                                if command:
+                                    self.process_command(command)
+                    time.sleep(0.01)
+                except OSError as e:
+                    if e.errno == 11:
+                        time.sleep(0.1)
+                        continue
+                    raise e
+        finally:
+            os.close(pipe_fd)
+
+    def start_listening(self):
+        self._listening = True
+        self._listener_thread = threading.Thread(target=self.listen_for_commands, daemon=True)
+        self._listener_thread.start()
+
+    def stop_listening(self):
+        self._listening = False
+        self._listener_thread.join(timeout=1)
+
+
+class Probe:
+    def __init__(self):
+        self.latencies = []
+        self.count = 0
+        self.event = threading.Event()
+
+    def ping(self, stamp):
+        self.latencies.append(time.perf_counter() - float(stamp))
+        self.event.set()
+
+    def cmd(self):
+        self.count += 1
+
+
+def run(cls, args, tmp):
+    pm = cls(os.path.join(tmp, "control"), os.path.join(tmp, "status"))
+    probe = Probe()
+    pm.register_commands({"ping": probe.ping, "cmd": probe.cmd})
+
+    # PipeManager 每条命令都会打印，测量期间把输出丢掉
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    pm.create_pipes()
+    pm.start_listening()
+    writer = os.open(pm.command_path, os.O_WRONLY)
+    try:
+        # 空闲 CPU
+        start = time.process_time()
+        time.sleep(args.idle)
+        idle_cpu = (time.process_time() - start) / args.idle * 100
+
+        # 延迟
+        for _ in range(args.pings):
+            probe.event.clear()
+            os.write(writer, f"ping {time.perf_counter()!r}\n".encode())
+            probe.event.wait(1)
+        latencies = sorted(probe.latencies)
+
+        # 吞吐
+        payload = b"cmd\n" * args.burst
+        start = time.perf_counter()
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(writer, view[:65536]):]
+        deadline = time.time() + 5
+        while probe.count < args.burst and time.time() < deadline:
+            time.sleep(0.001)
+        elapsed = time.perf_counter() - start
+    finally:
+        os.close(writer)
+        pm.stop_listening()
+        pm.cleanup_pipes()
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else float("nan")
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else float("nan")
+    print(f"{cls.__name__:<18} latency p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  "
+          f"burst {probe.count}/{args.burst} in {elapsed * 1000:7.1f} ms ({probe.count / elapsed:9.0f} cmd/s)  "
+          f"idle cpu {idle_cpu:5.2f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pings", type=int, default=200, help="测延迟的命令条数")
+    parser.add_argument("--burst", type=int, default=20000, help="测吞吐时一次写入的命令条数")
+    parser.add_argument("--idle", type=float, default=2, help="测空闲 CPU 的时长 (s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for cls in (LegacyPipeManager, PipeManager):
+            run(cls, args, tmp)
+
+
+if __name__ == "__main__":
+    main()
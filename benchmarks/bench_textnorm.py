@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+文本整理基准：旧的 textModeThread 正则替换 vs modules.textnorm 逐行扫描
+
+用法:
+    python benchmarks/bench_textnorm.py                 # 生成 4 MB 中英混合的 PDF 式文本
+    python benchmarks/bench_textnorm.py --mb 16
+    python benchmarks/bench_textnorm.py --file book.txt
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.textnorm import to_js
+
+
+def legacy(text):
+    # 原 textModeThread 的处理，每次调用都重新编译正则、重建转换表
+    text = re.sub(r'-\s*\n', '', text)
+    text = re.sub(r'(?<=[^.!。！：:："")])\n', ' ', text)
+    text = text.translate(str.maketrans({"-":  r"\-",
+                                  "]":  r"\]",
+                                  "\\": r"\\",
+                                  "^":  r"\^",
+                                  "$":  r"\$",
+                                  "*":  r"\*",
+                                  '"':  r"\""}))
+    segs = text.split("\n")
+    for i in range(len(segs)):
+        segs[i] = f'"<p>{ segs[i] }</p>"'
+    raw = "\n\n +".join(segs)
+    return f'var content = {raw}'
+
+
+def generate(mb, seed=0):
+    """按 PDF 复制的样子生成硬换行文本：英文段落带连字符断词，中文段落按固定宽度断行"""
+    rng = random.Random(seed)
+    words = "the of and to in is that for it as with was on be by this are from at or an which".split()
+    hanzi = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经"
+    lines = []
+    size = 0
+    while size < mb * 1024 * 1024:
+        if rng.random() < 0.5:
+            para = " ".join(rng.choice(words) for _ in range(rng.randint(40, 120))) + "."
+            width = 72
+        else:
+            para = "".join(rng.choice(hanzi) for _ in range(rng.randint(60, 200))) + "。"
+            width = 36
+        for start in range(0, len(para), width):
+            line = para[start:start + width]
+            if width == 72 and line[-1:].isalpha() and para[start + width:start + width + 1].isalpha():
+                line += "-"
+            lines.append(line)
+            size += len(line.encode()) + 1
+    return "\n".join(lines)
+
+
+def timeit(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=4, help="生成文本的大小 (MB)")
+    parser.add_argument("--file", help="使用真实文本文件")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = generate(args.mb)
+
+    mb = len(text.encode()) / 1024 / 1024
+    print(f"{mb:.1f} MB, {text.count(chr(10)) + 1} lines, repeat={args.repeat}")
+    for name, fn in [
+        ("legacy regex", lambda: legacy(text)),
+        ("textnorm.to_js", lambda: to_js(text)),
+    ]:
+        best = timeit(fn, args.repeat)
+        print(f"{name:<16} best {best * 1000:8.1f} ms  {mb / best:7.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
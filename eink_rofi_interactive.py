@@ -7,7 +7,9 @@ E-ink Display Interactive Settings Menu (Python版本)
 
 import os
 import sys
+import json
 import time
+import socket
 import subprocess
 from typing import Optional
 
@@ -20,19 +22,42 @@ from RofiHelper import RofiHelper
 class EinkRofiMenu:
     """E-ink设备的Rofi交互菜单"""
 
-    def __init__(self, pipe_path: str = "/tmp/eink_control"):
+    def __init__(self, pipe_path: str = "/tmp/eink_control", socket_path: str = "/tmp/eink.sock"):
         self.pipe_path = pipe_path
+        self.socket_path = socket_path
         self.rofi = RofiHelper()
 
     def check_app_running(self) -> bool:
         """检查e-ink应用是否正在运行"""
-        return os.path.exists(self.pipe_path)
+        return os.path.exists(self.socket_path) or os.path.exists(self.pipe_path)
 
     def send_command(self, command: str) -> None:
-        """发送命令到e-ink应用"""
+        """发送命令到e-ink应用：优先走控制 socket（等待执行结果），不可用时写命令管道"""
+        if os.path.exists(self.socket_path):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(5)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                # 只有连不上时才改写管道；请求发出去以后再失败就不能重发，否则命令会执行两次
+                sock.close()
+                print(f"Control socket unavailable, using pipe: {e}")
+            else:
+                with sock:
+                    try:
+                        sock.sendall((json.dumps({"commands": [command]}) + "\n").encode("utf-8"))
+                        reply = json.loads(sock.makefile("rb").readline())
+                    except (OSError, ValueError) as e:
+                        print(f"No reply for command '{command}': {e}")
+                        return
+                for result in reply.get("results", []):
+                    if not result["ok"]:
+                        print(f"Command '{result['command']}' failed: {result['error']}")
+                return
         try:
             with open(self.pipe_path, 'w') as pipe:
-                pipe.write(command)
+                # 命令按行分帧，换行结尾，和其他写者同时写入时也不会粘在一起
+                pipe.write(command + "\n")
                 pipe.flush()
         except Exception as e:
             print(f"Error sending command '{command}': {e}")
@@ -48,6 +73,8 @@ class EinkRofiMenu:
                 "➕ Increase (+10)",
                 "➖ Decrease (-10)",
                 "🔄 Toggle (120/180)",
+                "🅰️ Auto (Otsu)",
+                "🔍 Local (Sauvola)",
                 "↩️ Back to Main Menu"
             ]
 
@@ -68,6 +95,12 @@ class EinkRofiMenu:
             elif choice == "🔄 Toggle (120/180)":
                 self.send_command("thresh_toggle")
                 last_selected = 3
+            elif choice == "🅰️ Auto (Otsu)":
+                self.send_command("thresh_otsu")
+                last_selected = 4
+            elif choice == "🔍 Local (Sauvola)":
+                self.send_command("thresh_sauvola")
+                last_selected = 5
 
     def adjust_size(self) -> None:
         """交互式大小调整"""
@@ -1,6 +1,5 @@
 #!/usr/bin/env python
 
-import re
 import os
 import sys
 import wx.adv
@@ -9,16 +8,26 @@ import wx
 import threading
 import pyperclip
 import time
-from pynput.mouse import Listener
-from pynput import keyboard
-from PIL import ImageGrab, Image
 from modules.ConfigManager import ConfigManager
 from modules.KeyEvent import KeyEvent
+from modules.InputHub import InputHub, compile_combo
 from modules.SizeManager import SizeManager
 from modules.WireManager import WireManager
 from modules.PipeManager import PipeManager
+from modules.ControlServer import ControlServer
+from modules.FrameServer import FrameServer
+from modules.FramePublisher import FramePublisher, flash_frame
+from modules.codec import CODECS
+from modules.ScreenCapture import ScreenCapture
+from modules.CaptureWorker import CaptureWorker
+from modules.clipboard import ClipboardWatcher
+from modules.textnorm import to_js
+from modules.PagedReader import PagedReader
+from modules.TextRenderer import TextRenderer
 from modules.mouse import getCursorInfo
-from modules.utils import debounce
+from modules import xdisplay
+from modules.utils import debounce, throttle, timer_stats, worker
+from modules.binarize import luminance, otsu_threshold, sauvola, threshold
 from mouse_magnet import MouseMagnet
 
 def create_menu_item(menu, label, func):
@@ -29,7 +38,8 @@ def create_menu_item(menu, label, func):
 
 def notify(message, tag):
     notify_id = {"eink-thresh": 11}[tag]
-    subprocess.run(["notify-send", "-r", str(notify_id), "E-ink Threshold", message], check=False)
+    # 不等待 notify-send 退出，避免拖慢阈值调整
+    subprocess.Popen(["notify-send", "-r", str(notify_id), "E-ink Threshold", message])
 
 class TaskBarIcon(wx.adv.TaskBarIcon):
     def __init__(self, frame, app):
@@ -66,6 +76,10 @@ class TaskBarIcon(wx.adv.TaskBarIcon):
         self.app.on_exit()
         os._exit(0)
 
+# state() 的键，也是控制 socket 允许订阅的键
+STATE_KEYS = ("thresh", "size", "ratio", "mode", "capture", "magnet", "file")
+
+
 class App(wx.App):
     def __init__(self):
         self.fromFile = False
@@ -80,26 +94,58 @@ class App(wx.App):
         self.size = SizeManager()
         self.wire = WireManager( self.size )
         self.clipboard = ""
-        self.file = open("./content", "r", encoding='utf-8').read()
+        # mmap 打开，页索引在后台建立，不把整个文件读进内存
+        self.reader = PagedReader("./content", page_chars=260)
         self.filePart = 0
+        # text_render = "server" 时在桌面端排版成 1-bit 页面，按图像发布，设备端不再排版
+        self.text_renderer = None
+        self.text_doc = None
+        if self.config.get("text_render", "browser") == "server":
+            self.text_renderer = TextRenderer(
+                self.config.get("device_size", [2600, 1600]),
+                font=self.config.get("text_font", None),
+                font_size=self.config.get("text_font_size", 40)
+            )
         self.captureMode = True
         self.scroll = 0
-        
-        # 键盘状态跟踪
-        self.alt_pressed = False
-        self.shift_pressed = False
+
         self.prevMD5 = ""
-        self.server = subprocess.Popen(["live-server", "./viewer", "--no-browser", "--port=8888"], stdout=subprocess.DEVNULL)
+        self.frame_server = FrameServer(
+            port=self.config.get("server_port", 8888),
+            frame_dir=self.config.get("frame_dir", None)
+        )
+        self.frame_server.publish("content.js", 'var content = "";')
+        self.frame_server.start()
+        self.publisher = FramePublisher(
+            self.frame_server,
+            codec=self.config.get("frame_codec", None),
+            link_kbps=self.config.get("link_kbps", 2000),
+            on_calibrated=lambda name: self.config.set("frame_codec", name)
+        )
+        # viewer 本地显示黑色遮罩完成刷新，遮罩图只在启动时按设备尺寸编码一次
+        self.frame_server.publish("flash.png", flash_frame(tuple(self.config.get("device_size", [2600, 1600]))))
+        self.capture = ScreenCapture()
+        self.capture_worker = CaptureWorker(self.captureWithRefresh)
         self.prevCursor = ""
-        self.keyListener = KeyEvent()
+        # 全程序共用一个键盘监听器和一个鼠标监听器
+        self.input = InputHub()
+        self.keyListener = KeyEvent(self.input)
 
         self.stop = False
         self.icon = None
 
         self.thresh = 180
+        # fixed: 使用 self.thresh；otsu: 每次截图按直方图自动选阈值；sauvola: 局部自适应阈值
+        self.thresh_mode = "fixed"
+        # 最近一次截图的灰度图，调整阈值时直接在内存中重新二值化
+        self.raw_gray = None
         self.x = 0
         self.y = 0
         self.pipe_manager = PipeManager()
+        # socket 控制接口和命令管道共用命令表；命令执行后推送状态变化给订阅者
+        self.control = ControlServer(self.pipe_manager, self.config.get("control_socket", "/tmp/eink.sock"),
+                                     state_keys=STATE_KEYS)
+        self.pipe_manager.on_command = lambda command, result: self.publish_state()
         self.mouse_magnet = None
         super(App, self).__init__(False)
 
@@ -110,13 +156,21 @@ class App(wx.App):
         return True
 
     def on_exit(self):
-        self.server.kill()
+        self.save_raw_frame()
+        self.frame_server.stop()
+        self.capture_worker.stop()
+        self.capture.close()
         # Clean up pipes
         self.pipe_manager.stop_listening()
         self.pipe_manager.cleanup_pipes()
+        self.control.stop()
         # Stop magnet if running
         if self.mouse_magnet:
             self.mouse_magnet.stop()
+        self.wire.hideWire()
+        self.input.stop()
+        self.reader.close()
+        xdisplay.close()
 
     def toggle_capture(self):
         if self.stop:
@@ -127,6 +181,7 @@ class App(wx.App):
             self.wire.showWire()
         else:
             self.wire.hideWire()
+        self.publish_state()
 
     def setStop(self, stop_state):
         """设置stop状态"""
@@ -139,6 +194,7 @@ class App(wx.App):
         else:
             self.captureMode = True
             self.wire.showWire()
+        self.publish_state()
 
     def toggleStop(self):
         self.setStop(not self.stop)
@@ -148,14 +204,19 @@ class App(wx.App):
         if not self.captureMode:
             self.toggle_capture()
         self.syncMode()
+        if self.textMode:
+            # 切到文本模式时立即显示当前剪贴板，之后等剪贴板变化事件
+            self.textModeThread()
 
     def syncMode(self):
         mode = "text" if self.textMode else "image"
+        if self.textMode and self.text_renderer:
+            # 页面已经是图像，viewer 按图像模式显示
+            mode = "page"
         output = f'var mode = "{mode}";'
-        with open('./viewer/mode.js', 'w') as file:
-            file.write(output)
-            file.close()
+        self.frame_server.publish("mode.js", output)
         self.updateScroll()
+        self.publish_state()
 
         print("Sync mode run")
         if not self.textMode:
@@ -168,9 +229,7 @@ class App(wx.App):
     def start_magnet(self):
         """添加当前鼠标X轴位置到磁铁列表并启动磁铁"""
         # 获取当前鼠标X轴位置
-        from pynput import mouse
-        mouse_controller = mouse.Controller()
-        current_x = mouse_controller.position[0]
+        current_x = xdisplay.pointer()[0]
         
         # 如果磁铁不存在，创建新的磁铁
         if self.mouse_magnet is None:
@@ -180,6 +239,7 @@ class App(wx.App):
             )
             self.mouse_magnet.start()
             print(f"鼠标磁铁已启动，初始位置X={current_x}")
+            self.publish_state()
         else:
             # 如果磁铁已存在，添加新位置
             self.mouse_magnet.add_magnet_position(current_x)
@@ -190,6 +250,7 @@ class App(wx.App):
             self.mouse_magnet.stop()
             self.mouse_magnet = None
             print("鼠标磁铁已停止，所有磁铁位置已清除")
+            self.publish_state()
         else:
             print("鼠标磁铁未运行")
 
@@ -235,21 +296,36 @@ class App(wx.App):
             is_active = self.mouse_magnet.toggle_pause()
             status = "已恢复" if is_active else "已暂停"
             print(f"磁铁功能{status}")
+            self.publish_state()
         else:
             print("鼠标磁铁未运行，无法切换状态")
 
+    def state(self):
+        """订阅者关心的状态快照，键为 STATE_KEYS（值都是字符串或数字，便于比较和 JSON 编码）"""
+        if self.mouse_magnet is None:
+            magnet = "off"
+        else:
+            magnet = "paused" if self.mouse_magnet.is_paused() else "on"
+        return {
+            "thresh": self.thresh_label(),
+            "size": f"{self.size.w}x{self.size.h}",
+            "ratio": self.size.ratio,
+            "mode": "text" if self.textMode else "image",
+            "capture": "stop" if self.stop else ("on" if self.captureMode else "off"),
+            "magnet": magnet,
+            "file": self.reader.path if self.fromFile else None,
+        }
+
+    @debounce(.05)
+    def publish_state(self):
+        """状态可能变化后调用；连续的变化合并成一次推送"""
+        self.control.update(self.state())
+
     def getText(self):
         text = ""
-        read_len = 260
 
         if self.fromFile:
-            # print( self.file )
-            # print( self.filePart, self.filePart*read_len )
-            # self.file.seek( max(self.filePart* read_len, 0) )
-            fromIndex = self.filePart * read_len
-            fromIndex = max(fromIndex, 0)
-            text = self.file[ fromIndex : fromIndex + read_len ]
-            # text = self.file.read( read_len )
+            text = self.reader.page(max(self.filePart, 0))
         else:
             text = pyperclip.paste()
 
@@ -262,132 +338,100 @@ class App(wx.App):
         if text != self.clipboard:
             print("Got clipboard: ", text)
             self.clipboard = text
-            # remove all pdf newline
-            text = re.sub(r'-\s*\n', '', text)
-
-            # TODO
-            # 英文文本PDF中的换行,要替换成空格
-            # 中文文本PDF中的换行,要替换成空字符串
-
-            text = re.sub(r'(?<=[^.!。！：:："")])\n', ' ', text)
-            text = text.translate(str.maketrans({"-":  r"\-",
-                                          "]":  r"\]",
-                                          "\\": r"\\",
-                                          "^":  r"\^",
-                                          "$":  r"\$",
-                                          "*":  r"\*",
-                                          '"':  r"\""}))
-            segs = text.split("\n")
-            for i in range(len(segs)):
-                segs[i] = f'"<p>{ segs[i] }</p>"'
-
-            raw = "\n\n +".join(segs)
-            output = f'var content = {raw}'
-            with open("./viewer/content.js", "w") as file:
-                file.write(output)
-                file.close()
             self.scroll = 0
+            if self.text_renderer:
+                self.text_doc = self.text_renderer.document(text)
+                self.showTextPage()
+                return
+            self.frame_server.publish("content.js", to_js(text))
             self.updateScroll()
 
             # self.refreshText()
 
-    def display_image(self, image):
-        image.save("./assets/to_view.png", optimize=True)
-        subprocess.getoutput("mv ./assets/to_view.png ./viewer/res.png")
-
-    def get_bw_image(self, image):
-        fn = lambda x : 255 if x > self.thresh else 0
-        return image.convert('L').point(fn, mode='1')
+    def showTextPage(self):
+        """发布当前页（self.scroll）的 1-bit 图像，并在后台渲染下一页"""
+        doc = self.text_doc
+        if doc is None:
+            return
+        renderer = self.text_renderer
+        while self.scroll > 0 and not doc.page_lines(self.scroll):
+            self.scroll -= 1
+        self.display_image(renderer.page(doc, self.scroll))
+        if not doc.last_page(self.scroll):
+            worker.submit(renderer.page, doc, self.scroll + 1)
 
-    def updateImage(self, x, y):
+    def display_image(self, image):
+        self.publisher.publish(image)
+
+    def binarize_gray(self, gray):
+        """按当前阈值模式二值化灰度图"""
+        if self.thresh_mode == "otsu":
+            self.thresh = otsu_threshold(gray)
+        elif self.thresh_mode == "sauvola":
+            return sauvola(gray)
+        return threshold(gray, self.thresh)
+
+    def thresh_label(self):
+        if self.thresh_mode == "fixed":
+            return str(self.thresh)
+        if self.thresh_mode == "otsu":
+            return f"otsu({self.thresh})"
+        return self.thresh_mode
+
+    def updateImage(self, x, y, job=None):
+        """截图并发布；job 不为空时在各阶段之间检查是否已被新请求取代"""
         startX = x - self.size.w
         startY = y - self.size.h
 
         endX = x + self.size.w
         endY = y + self.size.h
 
-        screen = ImageGrab.grab(bbox=(startX, startY, endX, endY))
-
-        w,h = screen.size
-        bw = 3 # border width
-        rm_border = screen.crop((bw,bw,w-bw, h-bw))
-        rm_border.save("./viewer/raw.png")
+        screen = self.capture.grab((startX, startY, endX, endY))
 
-        bw_screen = self.get_bw_image( screen )
-        self.display_image( bw_screen )
+        try:
+            if job: job.check()
+            gray = luminance(screen)
+        finally:
+            screen.close()
 
-        screen.close()
-        bw_screen.close()
+        # 灰度原图留在内存里，不再每次截图都写 raw.png
+        self.raw_gray = gray
+        if job: job.check()
+        bw_screen = self.binarize_gray(gray)
 
-    def refreshImage(self):
-        subprocess.getoutput("cp ./viewer/res.png ./viewer/tmp.png")
+        try:
+            if job: job.check()
+            self.display_image( bw_screen )
+        finally:
+            bw_screen.close()
 
-        fn = lambda x : 0
-        img = Image.new(mode="RGB", size=(2600, 1600))
-        img = img.convert("L").point(fn, mode="1")
-        img.save("./viewer/res.png", optimize=True)
-        img.close()
+    def flash(self, ms=500):
+        """让 viewer 在本地黑屏 ms 毫秒（e-ink 全刷），不再来回传图"""
+        self.frame_server.publish_event("flash", {"ms": ms})
 
-        time.sleep(.5)
-        subprocess.getoutput("cp ./viewer/tmp.png ./viewer/res.png")
+    def refreshImage(self):
+        self.flash()
 
-    @debounce(0.3)
     def updateImageWithRefresh(self, x, y):
-        """更新图像并刷新eink屏幕，合并操作避免双重显示"""
-        print(f"[DEBUG] updateImageWithRefresh called at position ({x}, {y}) - debounce timeout: 300ms")
-        
-        # 先显示黑屏准备刷新
-        print("[DEBUG] Displaying black screen for refresh...")
-        fn = lambda x : 0
-        img = Image.new(mode="RGB", size=(2600, 1600))
-        img = img.convert("L").point(fn, mode="1")
-        img.save("./viewer/res.png", optimize=True)
-        img.close()
-        
-        time.sleep(.5)
-        
-        # 然后更新并显示新图像
-        print("[DEBUG] Capturing and displaying new image...")
-        startX = x - self.size.w
-        startY = y - self.size.h
-        endX = x + self.size.w
-        endY = y + self.size.h
+        """更新图像并刷新eink屏幕；交给截图线程处理，新的点击会取消还没完成的旧请求"""
+        self.capture_worker.submit(x, y)
 
-        screen = ImageGrab.grab(bbox=(startX, startY, endX, endY))
-        w,h = screen.size
-        bw = 3 # border width
-        rm_border = screen.crop((bw,bw,w-bw, h-bw))
-        rm_border.save("./viewer/raw.png")
+    def captureWithRefresh(self, job, x, y):
+        print(f"[DEBUG] updateImageWithRefresh running at position ({x}, {y}) - queue wait: {self.capture_worker.last_wait * 1000:.1f}ms")
 
-        bw_screen = self.get_bw_image( screen )
-        self.display_image( bw_screen )
+        # 先让 viewer 黑屏准备刷新，新图像在遮罩下面替换
+        print("[DEBUG] Flashing viewer for refresh...")
+        self.flash()
 
-        screen.close()
-        bw_screen.close()
+        # 然后更新并显示新图像
+        job.check()
+        print("[DEBUG] Capturing and displaying new image...")
+        self.updateImage(x, y, job)
         print("[DEBUG] updateImageWithRefresh completed")
 
-
     @debounce(.05)
     def refreshText(self):
-        self.toggleMode()
-
-        fn = lambda x : 0
-        img = Image.new(mode="RGB", size=(2600, 1600))
-        img = img.convert("L").point(fn, mode="1")
-        img.save("./viewer/res.png", optimize=True)
-        img.close()
-
-        time.sleep(.5)
-
-        # fn = lambda x : 1
-        # img = Image.new(mode="RGB", size=(2600, 1600))
-        # img = img.convert("L").point(fn, mode="1")
-        # img.save("./viewer/res.png", optimize=True)
-        # img.close()
-        #
-        # time.sleep(.16)
-        self.textMode = True
-        self.syncMode()
+        self.flash()
 
     def refresh(self):
         if self.textMode:
@@ -409,12 +453,17 @@ class App(wx.App):
         self.y = y
         self.updateImage(x, y)
 
+    def onClipboardChange(self):
+        if self.captureMode and self.textMode and not self.fromFile:
+            self.textModeThread()
+
     def CheckLoop(self):
         while True:
             if not self.captureMode:
                 time.sleep(0.1)
                 continue
-            if self.textMode:
+            # 剪贴板由 ClipboardWatcher 的事件驱动，读文件时由滚轮翻页；只有没有 XFixes 时才轮询
+            if self.textMode and not self.fromFile and not self.clipboard_watcher.available:
                 self.textModeThread()
             else:
                 pass
@@ -423,27 +472,9 @@ class App(wx.App):
                 # self.imageModeThread()
             time.sleep(0.1)
 
-    def on_key_press(self, key):
-        """键盘按下事件"""
-        try:
-            if key == keyboard.Key.alt_l or key == keyboard.Key.alt_r:
-                self.alt_pressed = True
-            elif key == keyboard.Key.shift or key == keyboard.Key.shift_r:
-                self.shift_pressed = True
-        except AttributeError:
-            pass
-
-    def on_key_release(self, key):
-        """键盘释放事件"""
-        try:
-            if key == keyboard.Key.alt_l or key == keyboard.Key.alt_r:
-                self.alt_pressed = False
-            elif key == keyboard.Key.shift or key == keyboard.Key.shift_r:
-                self.shift_pressed = False
-        except AttributeError:
-            pass
-
-    def listenScroll(self):
+    def registerMouseEvents(self):
+        alt_shift = compile_combo("alt + shift")
+
         def on_click(x, y, button, pressed):
             if not self.captureMode: return
 
@@ -455,7 +486,7 @@ class App(wx.App):
                 
             if btn == "left":
                 # 检测 Alt+Shift+左键按下
-                if self.alt_pressed and self.shift_pressed:
+                if self.input.held(alt_shift):
                     print(f"Alt+Shift+左键按下检测到，位置: ({x}, {y})")
                     # 旋转磁铁位置
                     if hasattr(self, 'mouse_magnet') and self.mouse_magnet:
@@ -473,37 +504,46 @@ class App(wx.App):
             if hasattr(self, 'mouse_magnet') and self.mouse_magnet:
                 self.mouse_magnet.on_scroll(x, y, dx, dy)
             self.filePart -= dy
+            # 读文件时翻页由滚轮直接触发，不再靠 CheckLoop 轮询；页索引没建好时读页会等待，
+            # 放到后台工作线程，不卡住鼠标监听线程（wire 跟随等）
+            if self.fromFile and self.textMode and self.captureMode:
+                worker.submit(self.textModeThread)
 
-        # 启动键盘监听器
-        keyboard_listener = keyboard.Listener(
-            on_press=self.on_key_press,
-            on_release=self.on_key_release
-        )
-        keyboard_listener.start()
+        def on_move(x, y):
+            if self.mouse_magnet:
+                self.mouse_magnet.on_move(x, y)
+            self.moveWire(x, y)
 
-        with Listener(on_scroll=on_scroll, on_click=on_click) as listener:
-            listener.join()
+        self.input.on("click", on_click)
+        self.input.on("scroll", on_scroll)
+        self.input.on("move", on_move)
 
     def updateScroll(self):
-        with open("./viewer/scroll.js", "w") as file:
-            output = f"var scroll = {self.scroll};";
-            file.write(output)
-
-    def updateRegion(self):
-        while True:
-            if self.wire and self.wire.wire:
-                if self.textMode:
-                    self.wire.hideWire()
-                else:
-                    [x, y] = getCursorInfo()
-                    if self.wire and self.wire.wire:
-                        self.wire.wire.updatePos(x, y)
-            time.sleep(0.01)
+        if self.textMode and self.text_renderer:
+            self.showTextPage()
+            return
+        output = f"var scroll = {self.scroll};";
+        self.frame_server.publish("scroll.js", output)
+
+    @throttle(1 / 60)
+    def moveWire(self, x, y):
+        """wire 跟随鼠标移动事件，按显示刷新率（60Hz）合并，鼠标不动时不唤醒"""
+        wire = self.wire.wire
+        if wire is None:
+            return
+        if self.textMode:
+            self.wire.hideWire()
+        else:
+            wire.updatePos(x, y)
 
     def init(self):
+        # 剪贴板换了才读取；XFixes 不可用时 CheckLoop 继续轮询
+        self.clipboard_watcher = ClipboardWatcher(self.onClipboardChange)
         self.syncMode()
         self.registerKeyEvents()
         self.setup_pipe_commands()
+        self.control.start()
+        self.publish_state()
 
     def scrollUp(self):
         self.scroll = max(0, self.scroll-1 )
@@ -520,6 +560,7 @@ class App(wx.App):
 
         self.size.shrink()
         self.wire.updateSize()
+        self.publish_state()
 
     def expandCaptureRegion(self):
         if self.stop: return
@@ -528,6 +569,7 @@ class App(wx.App):
 
         self.size.expand()
         self.wire.updateSize()
+        self.publish_state()
 
     def redrawImage(self):
         if not self.textMode:
@@ -541,23 +583,34 @@ class App(wx.App):
 
     def reprocess_with_thresh(self):
         """重新处理现有图像，使用当前阈值"""
-        try:
-            # 从保存的原图重新应用阈值
-            raw_image = Image.open("./viewer/raw.png")
-            bw_image = self.get_bw_image(raw_image)
-            self.display_image(bw_image)
-            raw_image.close()
-            bw_image.close()
-            print(f"Reprocessed image with threshold: {self.thresh}")
-        except FileNotFoundError:
+        gray = self.raw_gray
+        if gray is None:
             print("No raw image found, capturing new image")
             # 如果没有原图，则重新捕获
             self.redrawImage()
+            return
+
+        try:
+            # 直接对内存中的灰度图重新应用阈值
+            bw_image = self.binarize_gray(gray)
+            self.display_image(bw_image)
+            bw_image.close()
+            print(f"Reprocessed image with threshold: {self.thresh_label()}")
         except Exception as e:
             print(f"Error reprocessing image: {e}")
             # 如果处理失败，尝试重新捕获
             self.redrawImage()
 
+    def save_raw_frame(self, path="./viewer/raw.png"):
+        """按需把最近一次截图（灰度，去掉边框）写到磁盘"""
+        gray = self.raw_gray
+        if gray is None:
+            return
+        w,h = gray.size
+        bw = 3 # border width
+        gray.crop((bw,bw,w-bw, h-bw)).save(path)
+        print(f"Saved raw frame to {path}")
+
     def shrinkRatio(self):
         if self.stop: return
         if self.textMode: return
@@ -565,6 +618,7 @@ class App(wx.App):
 
         self.size.shrinkRatio()
         self.wire.updateSize()
+        self.publish_state()
 
     def expandRatio(self):
         if self.stop: return
@@ -573,34 +627,47 @@ class App(wx.App):
 
         self.size.expandRatio()
         self.wire.updateSize()
+        self.publish_state()
 
     def expandThresh(self):
+        self.thresh_mode = "fixed"
         self.thresh += 10
         print( self.thresh )
-        notify(f"Threshold: {self.thresh} (+10)", "eink-thresh")
         self.reprocess_with_thresh()
+        notify(f"Threshold: {self.thresh} (+10)", "eink-thresh")
         # Update status for interactive display
         self.pipe_manager.write_status(f"thresh:{self.thresh}")
 
     def toggleThresh(self):
+        self.thresh_mode = "fixed"
         if self.thresh > 150:
             self.thresh = 120
         else:
             self.thresh = 180
         print( self.thresh )
-        notify(f"Threshold: {self.thresh} (toggled)", "eink-thresh")
         self.reprocess_with_thresh()
+        notify(f"Threshold: {self.thresh} (toggled)", "eink-thresh")
         # Update status for interactive display
         self.pipe_manager.write_status(f"thresh:{self.thresh}")
 
     def shrinkThresh(self):
+        self.thresh_mode = "fixed"
         self.thresh -= 10
         print( self.thresh )
-        notify(f"Threshold: {self.thresh} (-10)", "eink-thresh")
         self.reprocess_with_thresh()
+        notify(f"Threshold: {self.thresh} (-10)", "eink-thresh")
         # Update status for interactive display
         self.pipe_manager.write_status(f"thresh:{self.thresh}")
 
+    def setThreshMode(self, mode):
+        """切换阈值模式；再次选择当前的自动模式时回到固定阈值"""
+        self.thresh_mode = "fixed" if self.thresh_mode == mode else mode
+        print( self.thresh_mode )
+        self.reprocess_with_thresh()
+        notify(f"Threshold: {self.thresh_label()}", "eink-thresh")
+        # Update status for interactive display
+        self.pipe_manager.write_status(f"thresh:{self.thresh_label()}")
+
     def registerKeyEvents(self):
         # self.keyListener.on("left", self.scrollUp)
         # self.keyListener.on("right", self.scrollDown)
@@ -725,6 +792,8 @@ class App(wx.App):
             "thresh_up": self.expandThresh,
             "thresh_down": self.shrinkThresh,
             "thresh_toggle": self.toggleThresh,
+            "thresh_otsu": lambda: self.setThreshMode("otsu"),
+            "thresh_sauvola": lambda: self.setThreshMode("sauvola"),
             "size_up": self.expandCaptureRegion,
             "size_down": self.shrinkCaptureRegion,
             "ratio_up": self.expandRatio,
@@ -743,9 +812,32 @@ class App(wx.App):
         else:
             print(f"Unknown command: {command}")
 
+    def openFile(self, path="./content"):
+        """切换到从文件读取（不用重启）"""
+        try:
+            self.reader.open(os.path.expanduser(path))
+        except OSError as e:
+            print(f"Cannot open {path}: {e}")
+            self.pipe_manager.write_status(f"file:error {e}")
+            return
+        self.fromFile = True
+        self.filePart = 0
+        self.clipboard = ""
+        if self.textMode:
+            self.textModeThread()
+        self.pipe_manager.write_status(f"file:{self.reader.path}")
+
+    def closeFile(self):
+        """回到剪贴板文本"""
+        self.fromFile = False
+        self.clipboard = ""
+        if self.textMode:
+            self.textModeThread()
+        self.pipe_manager.write_status("file:none")
+
     def get_thresh(self):
         """获取当前阈值"""
-        self.pipe_manager.write_status(f"thresh:{self.thresh}")
+        self.pipe_manager.write_status(f"thresh:{self.thresh_label()}")
 
     def get_size(self):
         """获取当前大小"""
@@ -755,12 +847,58 @@ class App(wx.App):
         """获取当前比例"""
         self.pipe_manager.write_status(f"ratio:{self.size.ratio}")
 
+    def get_capture_stats(self):
+        """获取截图线程的统计（排队等待时间、被合并/取消的请求数）"""
+        stats = self.capture_worker.stats()
+        self.pipe_manager.write_status("capture:" + " ".join(
+            f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in stats.items()
+        ))
+
+    def get_codec_stats(self):
+        """获取帧编码器的平均/最近一次编码耗时和字节数（只列出实际编码过帧的编码器）"""
+        active = self.publisher.codec
+        used = [codec for codec in CODECS.values() if codec.count or codec is active]
+        if not used:
+            self.pipe_manager.write_status("codec:none")
+            return
+        for codec in used:
+            stats = codec.stats()
+            self.pipe_manager.write_status(
+                f"codec:{stats['codec']}{'*' if codec is active else ''} frames={stats['frames']} "
+                f"mean_ms={stats['mean_ms']:.1f} mean_bytes={stats['mean_bytes']:.0f} "
+                f"last_ms={stats['last_ms']:.1f} last_bytes={stats['last_bytes']}"
+            )
+
+    def get_timer_stats(self):
+        """获取 debounce/throttle 的触发与合并次数"""
+        for name, stats in timer_stats().items():
+            self.pipe_manager.write_status(f"timer:{name} calls={stats['calls']} fired={stats['fired']} coalesced={stats['coalesced']}")
+
+    def get_magnet_stats(self):
+        """获取鼠标磁铁的事件数、warp 次数和 CPU 消耗"""
+        if not self.mouse_magnet:
+            self.pipe_manager.write_status("magnet:off")
+            return
+        stats = self.mouse_magnet.stats()
+        self.pipe_manager.write_status(f"magnet:events={stats['events']} warps={stats['warps']} cpu_ms={stats['cpu_ms']:.1f}")
+
+    def get_text_stats(self):
+        """获取服务端文本渲染的页面缓存命中情况"""
+        if not self.text_renderer:
+            self.pipe_manager.write_status("text:browser")
+            return
+        stats = self.text_renderer.stats()
+        self.pipe_manager.write_status(f"text:hits={stats['hits']} misses={stats['misses']} cached={stats['cached']} documents={stats['documents']}")
+
     def setup_pipe_commands(self):
         """设置管道命令处理器"""
         command_map = {
             "thresh_up": self.expandThresh,
             "thresh_down": self.shrinkThresh,
             "thresh_toggle": self.toggleThresh,
+            "thresh_otsu": lambda: self.setThreshMode("otsu"),
+            "thresh_sauvola": lambda: self.setThreshMode("sauvola"),
             "size_up": self.expandCaptureRegion,
             "size_down": self.shrinkCaptureRegion,
             "ratio_up": self.expandRatio,
@@ -772,6 +910,16 @@ class App(wx.App):
             "get_thresh": self.get_thresh,
             "get_size": self.get_size,
             "get_ratio": self.get_ratio,
+            "get_capture_stats": self.get_capture_stats,
+            "get_timer_stats": self.get_timer_stats,
+            "get_codec_stats": self.get_codec_stats,
+            "get_magnet_stats": self.get_magnet_stats,
+            "get_text_stats": self.get_text_stats,
+            "page_next": self.scrollDown,
+            "page_prev": self.scrollUp,
+            "save_raw": self.save_raw_frame,
+            "open_file": self.openFile,
+            "close_file": self.closeFile,
             "start_magnet": self.start_magnet,
             "stop_magnet": self.stop_magnet
         }
@@ -791,8 +939,8 @@ def main():
     # app.keyListener.on("0", done)
 
     threading.Thread(target=app.MainLoop).start()
-    threading.Thread(target=app.listenScroll).start()
-    threading.Thread(target=app.updateRegion).start()
+    app.registerMouseEvents()
+    app.input.start()
 
     # Create command pipe and start command listener
     app.pipe_manager.create_pipes()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+import time
+import threading
+
+
+class Cancelled(Exception):
+    """任务已被更新的请求取代"""
+
+
+class CaptureJob:
+    def __init__(self, worker, generation, args, kwargs):
+        self.worker = worker
+        self.generation = generation
+        self.args = args
+        self.kwargs = kwargs
+        self.submitted = time.perf_counter()
+
+    @property
+    def stale(self):
+        return self.generation != self.worker.generation
+
+    def check(self):
+        """在流水线的每个阶段之间调用，有更新的请求时中止当前任务"""
+        if self.stale:
+            raise Cancelled()
+
+
+class CaptureWorker:
+    """截图工作线程 - 单槽信箱，只保留最新的请求
+
+    handler(job, *args, **kwargs) 在工作线程中执行，应在各阶段之间调用 job.check()。
+    新请求到达时：还在排队的旧请求被直接替换，正在执行的旧请求在下一次 check() 时中止。
+    """
+
+    def __init__(self, handler, name="capture-worker"):
+        self.handler = handler
+        self.generation = 0
+        self._pending = None
+        self._cond = threading.Condition()
+        self._running = True
+
+        # 统计
+        self.submitted = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, *args, **kwargs):
+        """提交请求，立即返回"""
+        with self._cond:
+            self.generation += 1
+            self.submitted += 1
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = CaptureJob(self, self.generation, args, kwargs)
+            self._cond.notify()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or not self._running)
+                if not self._running:
+                    return
+                job, self._pending = self._pending, None
+
+            wait = time.perf_counter() - job.submitted
+            self.last_wait = wait
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+            try:
+                self.handler(job, *job.args, **job.kwargs)
+                self.completed += 1
+            except Cancelled:
+                self.cancelled += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Error in {self._thread.name}: {e}")
+
+    def stats(self):
+        started = self.completed + self.cancelled + self.failed
+        return {
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "completed": self.completed,
+            "failed": self.failed,
+            "mean_wait_ms": self.total_wait / max(started, 1) * 1000,
+            "max_wait_ms": self.max_wait * 1000,
+            "last_wait_ms": self.last_wait * 1000,
+        }
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self.generation += 1
+            self._cond.notify()
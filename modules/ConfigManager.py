@@ -22,6 +22,11 @@ class ConfigManager():
         self.config[key] = val
         self.saveConfig()
 
+    def set(self, key, val):
+        """与 update 相同，但允许写入新的键"""
+        self.config[key] = val
+        self.saveConfig()
+
     def saveConfig(self):
         output = toml.dumps(self.config)
         with open(self.filepath, "w") as file:
@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+
+import os
+import json
+import socket
+import select
+import threading
+
+from modules.utils import Worker
+
+
+def _encode(message):
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class _Client:
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.subscribed = None  # None: 未订阅；空集合: 订阅全部；否则只订阅这些键
+        self.pending_state = {}  # 还没发出去的状态变化，同一个键只保留最新值
+        self.watched = False  # 是否在等 EPOLLOUT
+        self.eof = False  # 对端已关闭写端，不再读
+        self.closing = False  # 排队的请求都处理完了，回复写完就断开
+        self.hup = False  # 对端已完全关闭，fd 已从 epoll 移除
+
+
+class ControlServer:
+    """Unix socket 控制接口，和命令管道并存，命令表和执行都复用 PipeManager
+
+    协议按行分帧，每行一个 JSON 请求，服务端对每个请求回一行 JSON：
+
+        {"id": 1, "commands": ["thresh_up", "get_size"]}
+        -> {"id": 1, "ok": true, "results": [{"command": "thresh_up", "ok": true, "status": ["thresh:190"], "error": null}, ...]}
+
+        {"id": 2, "subscribe": ["thresh", "mode"]}     （true 或空列表表示订阅全部）
+        -> {"id": 2, "ok": true, "state": {"thresh": "190", "mode": "image"}}
+        之后每次变化推送 {"event": "state", "changes": {"thresh": "200"}}
+
+        {"id": 3, "unsubscribe": true} / {"id": 4, "get": "state"}
+
+    不是 JSON 的行按 ";" 分隔的命令处理，方便 `echo "size_up; get_size" | socat - UNIX:/tmp/eink.sock`。
+    状态推送按键合并：客户端读得慢时只保留每个键的最新值，不会丢掉最终状态，也不会无限堆积。
+    请求在单独的工作线程里按到达顺序处理，慢命令不会卡住 epoll 线程的读写和状态推送。
+    """
+
+    READ_SIZE = 65536
+    MAX_LINE = 65536
+    MAX_OUTPUT = 1 << 20  # 回复堆积超过这个大小的客户端直接断开
+
+    def __init__(self, pipe_manager, path="/tmp/eink.sock", state_keys=None):
+        """state_keys: 允许订阅的状态键，None 表示不检查"""
+        self.pipe_manager = pipe_manager
+        self.path = path
+        self.state_keys = frozenset(state_keys) if state_keys is not None else None
+        self.state = {}
+        self._clients = {}  # fd -> _Client
+        self._lock = threading.RLock()
+        self._server = None
+        self._epoll = None
+        self._wakeup = None
+        self._running = False
+        self._thread = None
+        self._worker = Worker("control-commands")
+
+    def start(self):
+        if self._running:
+            return
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        os.chmod(self.path, 0o600)
+        self._server.listen(8)
+        self._server.setblocking(False)
+
+        self._epoll = select.epoll()
+        self._wakeup = os.pipe()
+        os.set_blocking(self._wakeup[0], False)
+        self._epoll.register(self._server.fileno(), select.EPOLLIN)
+        self._epoll.register(self._wakeup[0], select.EPOLLIN)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="control-socket", daemon=True)
+        self._thread.start()
+        print(f"Control socket listening: {self.path}")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        os.write(self._wakeup[1], b"\0")
+        self._thread.join(timeout=1)
+        with self._lock:
+            for client in list(self._clients.values()):
+                self._drop(client)
+            self._epoll.close()
+            self._epoll = None
+        self._server.close()
+        for fd in self._wakeup:
+            os.close(fd)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        print("Stopped control socket")
+
+    def update(self, state):
+        """合并新的状态快照，只把变化的键推送给订阅者"""
+        with self._lock:
+            changes = {k: v for k, v in state.items() if self.state.get(k) != v}
+            if not changes:
+                return
+            self.state.update(changes)
+            if self._epoll is None:
+                return
+            for client in list(self._clients.values()):
+                if client.subscribed is None:
+                    continue
+                wanted = {k: v for k, v in changes.items() if not client.subscribed or k in client.subscribed}
+                if wanted:
+                    client.pending_state.update(wanted)
+                    self._flush(client)
+
+    def _loop(self):
+        server_fd = self._server.fileno()
+        while self._running:
+            try:
+                events = self._epoll.poll()
+            except OSError as e:
+                print(f"Error in control socket loop: {e}")
+                return
+            for fd, mask in events:
+                if fd == server_fd:
+                    self._accept()
+                elif fd == self._wakeup[0]:
+                    os.read(fd, 64)
+                else:
+                    client = self._clients.get(fd)
+                    if client is None:
+                        continue
+                    if mask & select.EPOLLERR:
+                        with self._lock:
+                            self._drop(client)
+                        continue
+                    if mask & select.EPOLLHUP:
+                        self._hangup(client)
+                        continue
+                    if mask & select.EPOLLOUT:
+                        with self._lock:
+                            self._flush(client)
+                    if mask & select.EPOLLIN and self._clients.get(fd) is client:
+                        self._read(client)
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except BlockingIOError:
+                return
+            sock.setblocking(False)
+            client = _Client(sock)
+            with self._lock:
+                self._clients[sock.fileno()] = client
+                self._epoll.register(sock.fileno(), select.EPOLLIN)
+
+    def _hangup(self, client):
+        """对端写完就完全关闭（sendall 后 close、socat -u）：先读完缓冲区里的请求，
+        不再监听这个 fd（否则 EPOLLHUP 会一直触发），排队的请求处理完后由 _finish 断开"""
+        with self._lock:
+            client.hup = True
+            try:
+                self._epoll.unregister(client.sock.fileno())
+            except OSError:
+                pass
+        self._read(client)
+
+    def _read(self, client):
+        while True:
+            try:
+                chunk = client.sock.recv(self.READ_SIZE)
+            except BlockingIOError:
+                break
+            except OSError:
+                with self._lock:
+                    self._drop(client)
+                return
+            if not chunk:
+                # `echo cmd | socat - UNIX:...` 发完就关闭写端，等排队的请求回复完再断开
+                line = client.inbuf.strip()
+                if line:
+                    self._worker.submit(self._process, client, bytes(line))
+                with self._lock:
+                    client.eof = True
+                    self._flush(client)
+                self._worker.submit(self._finish, client)
+                return
+            client.inbuf += chunk
+            end = client.inbuf.rfind(b"\n")
+            if end >= 0:
+                lines = bytes(client.inbuf[:end]).split(b"\n")
+                del client.inbuf[:end + 1]
+                for line in lines:
+                    line = line.strip()
+                    if line:
+                        self._worker.submit(self._process, client, line)
+            if len(client.inbuf) > self.MAX_LINE:
+                self._reply(client, {"ok": False, "error": "request too long"})
+                with self._lock:
+                    self._drop(client)
+                return
+
+    def _process(self, client, line):
+        """在工作线程中执行：处理一个请求，完成后回复（客户端已断开时命令照常执行，只是不回复）"""
+        self._reply(client, self._handle(client, line))
+
+    def _finish(self, client):
+        """对端关闭写端后排在它所有请求之后执行，回复发完再断开"""
+        with self._lock:
+            if self._clients.get(client.sock.fileno()) is client:
+                client.closing = True
+                self._flush(client)
+
+    def _handle(self, client, line):
+        try:
+            request = json.loads(line) if line.startswith(b"{") else None
+        except ValueError as e:
+            return {"ok": False, "error": f"invalid JSON: {e}"}
+
+        if request is None:
+            commands = [c.strip() for c in line.decode("utf-8", "replace").split(";") if c.strip()]
+            return self._run(commands)
+
+        response = {"id": request.get("id")}
+        if "commands" in request or "command" in request:
+            commands = request["commands"] if "commands" in request else [request["command"]]
+            # "inc" 这样的字符串不能当成字符列表逐个执行
+            if not isinstance(commands, list) or not commands or not all(isinstance(c, str) and c for c in commands):
+                response.update(ok=False, error="commands must be a non-empty list of command strings "
+                                                "(or command: a single string)")
+            else:
+                response.update(self._run(commands))
+        elif "subscribe" in request:
+            keys = request["subscribe"]
+            error = self._check_keys(keys)
+            if error:
+                response.update(ok=False, error=error)
+                return response
+            with self._lock:
+                client.subscribed = set() if keys is True else set(keys)
+                state = {k: v for k, v in self.state.items() if not client.subscribed or k in client.subscribed}
+            response.update(ok=True, state=state)
+        elif "unsubscribe" in request:
+            with self._lock:
+                client.subscribed = None
+                client.pending_state.clear()
+            response.update(ok=True)
+        elif request.get("get") == "state":
+            with self._lock:
+                response.update(ok=True, state=dict(self.state))
+        else:
+            response.update(ok=False, error="unknown request")
+        return response
+
+    def _check_keys(self, keys):
+        """subscribe 只接受 true 或状态键的列表，返回错误信息；"thresh" 这样的字符串不能当成字符集合"""
+        if keys is True:
+            return None
+        if not isinstance(keys, list) or not all(isinstance(k, str) for k in keys):
+            return "subscribe must be true or a list of state keys"
+        if self.state_keys is not None:
+            unknown = [k for k in keys if k not in self.state_keys]
+            if unknown:
+                return f"unknown state keys: {', '.join(unknown)} (known: {', '.join(sorted(self.state_keys))})"
+        return None
+
+    def _run(self, commands):
+        """按顺序执行一组命令，出错时继续执行后面的"""
+        results = [self.pipe_manager.execute(command) for command in commands]
+        return {"ok": all(r["ok"] for r in results), "results": results}
+
+    def _reply(self, client, response):
+        with self._lock:
+            if self._clients.get(client.sock.fileno()) is not client:
+                return
+            client.outbuf += _encode(response)
+            self._flush(client)
+
+    def _flush(self, client):
+        """在持有 _lock 时调用：先写完已排队的回复，再把合并后的状态变化作为一条事件写出"""
+        while True:
+            if not client.outbuf:
+                if not client.pending_state:
+                    break
+                client.outbuf += _encode({"event": "state", "changes": client.pending_state})
+                client.pending_state = {}
+            try:
+                sent = client.sock.send(client.outbuf)
+            except BlockingIOError:
+                break
+            except OSError:
+                self._drop(client)
+                return
+            del client.outbuf[:sent]
+
+        if len(client.outbuf) > self.MAX_OUTPUT:
+            print("Control client is not reading, disconnecting")
+            self._drop(client)
+            return
+        if client.closing and not client.outbuf:
+            self._drop(client)
+            return
+        if client.hup:
+            return
+        watch = bool(client.outbuf)
+        if watch != client.watched or client.eof:
+            self._epoll.modify(client.sock.fileno(),
+                               (0 if client.eof else select.EPOLLIN) | (select.EPOLLOUT if watch else 0))
+            client.watched = watch
+
+    def _drop(self, client):
+        fd = client.sock.fileno()
+        if self._clients.pop(fd, None) is None:
+            return
+        if self._epoll is not None:
+            try:
+                self._epoll.unregister(fd)
+            except OSError:
+                pass
+        client.sock.close()
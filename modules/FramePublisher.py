@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+
+import io
+import json
+import threading
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+from modules.codec import CODECS, DEFAULT_CODEC, choose_codec, get_codec, measure
+
+
+@lru_cache(maxsize=4)
+def flash_frame(size):
+    """刷新用的全黑帧，每种设备尺寸只编码一次"""
+    image = Image.new("1", tuple(size), 0)
+    buf = io.BytesIO()
+    image.save(buf, "PNG", optimize=True)
+    image.close()
+    return buf.getvalue()
+
+
+class FramePublisher:
+    """帧发布器 - 对比上一帧，只把变化的 tile 发给 viewer
+
+    每次发布都会更新 frame.json:
+        完整帧: {"id", "src", "full": true, "w", "h"}
+        增量帧: {"id", "src", "base", "full": false, "w", "h", "atlas", "rects": [[x, y, w, h, sy], ...]}
+    id 是帧存储中的序号，src (res.<epoch>.<id>.png) 是这一帧的完整图像。
+    增量帧里所有变化区域竖向拼接在 atlas 图中，sy 是该区域在 atlas 中的 y 坐标。
+    viewer 当前帧 id 与 base 不一致时应该直接请求 src。
+    """
+
+    def __init__(self, frame_server, tile=64, full_ratio=0.5, codec=None, link_kbps=2000, on_calibrated=None):
+        """
+        Args:
+            codec: 编码器名称（见 modules.codec），为 None 时在第一帧上实测后自动选择
+            link_kbps: 到设备的带宽估计，用于自动选择编码器
+            on_calibrated: 自动选择完成后的回调 fn(codec_name)，用于保存结果
+        """
+        # tile 宽度必须是 8 的倍数，这样可以直接在 1-bit 打包数据上按字节切分
+        assert tile % 8 == 0
+        self.frame_server = frame_server
+        self.tile = tile
+        self.full_ratio = full_ratio
+        self.link_kbps = link_kbps
+        self.on_calibrated = on_calibrated
+        self.codec = None
+        if codec is not None:
+            self.codec = get_codec(codec)
+            if not self.codec.browser:
+                print(f"Frame codec '{codec}' cannot be decoded by the viewer, using {DEFAULT_CODEC}")
+                self.codec = get_codec(DEFAULT_CODEC)
+        self.image = None
+        self.frame_id = 0
+        self._bits = None
+        self._atlas_name = None
+        self._lock = threading.Lock()
+
+    def encode(self, image):
+        if self.codec is None:
+            self._calibrate(image)
+        return self.codec.encode(image)
+
+    def _calibrate(self, image):
+        """在真实帧上测量所有 viewer 可解码的编码器，选出编码 + 传输最快的"""
+        results = measure([image], [codec for codec in CODECS.values() if codec.browser])
+        name = choose_codec(results, self.link_kbps)
+        self.codec = get_codec(name)
+        print(f"Frame codec calibrated: {name} ({self.link_kbps} kbps link)")
+        if self.on_calibrated:
+            self.on_calibrated(name)
+
+    def _packed(self, image):
+        """1-bit 图像的打包数据 (h, ceil(w/8))，每行按字节对齐"""
+        w, h = image.size
+        return np.frombuffer(image.tobytes(), dtype=np.uint8).reshape(h, (w + 7) // 8)
+
+    def _dirty_tiles(self, bits):
+        """XOR 上一帧，返回每个 tile 是否变化的 (rows, cols) bool 矩阵"""
+        diff = np.bitwise_xor(self._bits, bits)
+        h, row_bytes = diff.shape
+        tile_bytes = self.tile // 8
+        rows = -(-h // self.tile)
+        cols = -(-row_bytes // tile_bytes)
+        padded = np.zeros((rows * self.tile, cols * tile_bytes), dtype=np.uint8)
+        padded[:h, :row_bytes] = diff
+        return padded.reshape(rows, self.tile, cols, tile_bytes).any(axis=(1, 3))
+
+    def _dirty_rects(self, dirty, size):
+        """把每一行中连续变化的 tile 合并为矩形 (x, y, w, h)"""
+        width, height = size
+        rects = []
+        for row in np.flatnonzero(dirty.any(axis=1)):
+            cols = np.flatnonzero(dirty[row])
+            # 连续段的起点: 与前一个 col 不相邻的位置
+            breaks = np.flatnonzero(np.diff(cols) > 1)
+            starts = np.concatenate(([cols[0]], cols[breaks + 1]))
+            ends = np.concatenate((cols[breaks], [cols[-1]]))
+            y = int(row) * self.tile
+            h = min(self.tile, height - y)
+            for start, end in zip(starts, ends):
+                x = int(start) * self.tile
+                w = min((int(end) + 1) * self.tile, width) - x
+                rects.append((x, y, w, h))
+        return rects
+
+    def publish(self, image):
+        """发布一帧 1-bit 图像，变化足够小时只发送增量"""
+        with self._lock:
+            self._publish(image)
+
+    def _publish(self, image):
+        bits = self._packed(image)
+        full = self._bits is None or self._bits.shape != bits.shape or self.image.size != image.size
+
+        if not full:
+            dirty = self._dirty_tiles(bits)
+            ratio = dirty.mean()
+            if ratio == 0:
+                return
+            full = ratio > self.full_ratio
+
+        base = self.frame_id
+        self.image = image.copy()
+        self._bits = bits
+
+        if full:
+            self._publish_full()
+        else:
+            self._publish_delta(base, self._dirty_rects(dirty, image.size))
+
+    def _publish_full(self):
+        w, h = self.image.size
+        data = self.encode(self.image)
+        self._drop_atlas()
+        self.frame_id = self.frame_server.publish_frame(data)
+        self.frame_server.publish("frame.json", json.dumps({
+            "id": self.frame_id, "src": self.frame_server.frames.name(self.frame_id),
+            "full": True, "w": w, "h": h,
+        }))
+
+    def _publish_delta(self, base, rects):
+        image = self.image
+        atlas = Image.new("1", (max(r[2] for r in rects), sum(r[3] for r in rects)))
+        meta = []
+        sy = 0
+        for x, y, w, h in rects:
+            atlas.paste(image.crop((x, y, x + w, y + h)), (0, sy))
+            meta.append([x, y, w, h, sy])
+            sy += h
+
+        data = self.encode(atlas)
+        atlas.close()
+
+        # 完整帧只在没有跟上增量的 viewer 请求时才编码
+        self.frame_id = self.frame_server.publish_frame(loader=lambda: self.encode(image))
+
+        self._drop_atlas()
+        self._atlas_name = f"delta.{self.frame_id}.png"
+        self.frame_server.publish(self._atlas_name, data)
+        w, h = image.size
+        self.frame_server.publish("frame.json", json.dumps({
+            "id": self.frame_id, "src": self.frame_server.frames.name(self.frame_id),
+            "base": base, "full": False, "w": w, "h": h,
+            "atlas": self._atlas_name, "rects": meta,
+        }))
+
+    def _drop_atlas(self):
+        if self._atlas_name:
+            self.frame_server.remove(self._atlas_name)
+            self._atlas_name = None
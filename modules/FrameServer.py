@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+
+import os
+import re
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from modules.FrameStore import FrameStore
+
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+    ".json": "application/json",
+    ".png": "image/png",
+}
+
+# res.<epoch>.<seq>.png: 某一帧的固定版本，内容永远不变（epoch 保证重启后不会复用旧名字）
+FRAME_NAME = re.compile(r"res\.([0-9a-f]+)\.(\d+)\.png")
+
+
+class FrameServer:
+    """内存帧服务器 - 替代 live-server，直接从内存提供 viewer 页面、帧和 js 状态文件"""
+
+    def __init__(self, host="0.0.0.0", port=8888, viewer_dir="./viewer", frame_dir=None, keep_frames=4):
+        self.host = host
+        self.port = port
+        self.viewer_dir = viewer_dir
+        # 每个进程一个随机前缀：序号每次启动都从 0 开始，ETag 和帧文件名带上它才不会和上一次运行的缓存撞上
+        self.epoch = os.urandom(4).hex()
+        # 最近几帧按序号保存，res.png 只是最新一帧的别名
+        self.frames = FrameStore(keep=keep_frames, directory=frame_dir, epoch=self.epoch)
+        # name -> (data, etag, content_type)，发布新内容只替换字典里的引用
+        self.resources = {}
+        # name -> 最后一次发布时的序号，用于告诉 viewer 哪些资源变了
+        self.versions = {}
+        # name -> (序号, payload)，一次性的指令（例如 flash），随变化通知一起推送
+        self.events = {}
+        # name -> 延迟编码函数，第一次被请求时才生成数据
+        self._loaders = {}
+        self._load_lock = threading.Lock()
+        self._version = 0
+        self._changed = threading.Condition()
+        self.poll_timeout = 25
+        self.heartbeat = 15
+        self._httpd = None
+        self._thread = None
+
+        self.publish("index.html", self._read_viewer_file("index.html"))
+
+    def _read_viewer_file(self, name):
+        with open(os.path.join(self.viewer_dir, name), "rb") as file:
+            return file.read()
+
+    def publish(self, name, data, content_type=None):
+        """发布（替换）一个资源"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if content_type is None:
+            content_type = CONTENT_TYPES.get(os.path.splitext(name)[1], "application/octet-stream")
+
+        with self._changed:
+            self._version += 1
+            self._loaders.pop(name, None)
+            self.resources[name] = (data, self._etag(self._version), content_type)
+            self.versions[name] = self._version
+            self._changed.notify_all()
+
+    def _etag(self, version):
+        return f'"{self.epoch}-{version}"'
+
+    def publish_lazy(self, name, loader, content_type=None):
+        """发布一个资源，但只在有人请求时才调用 loader() 生成数据"""
+        if content_type is None:
+            content_type = CONTENT_TYPES.get(os.path.splitext(name)[1], "application/octet-stream")
+
+        with self._changed:
+            self._version += 1
+            self._loaders[name] = (loader, self._etag(self._version), content_type)
+            self.resources.pop(name, None)
+            self.versions[name] = self._version
+            self._changed.notify_all()
+
+    def publish_frame(self, data=None, loader=None):
+        """发布新的一帧，返回序号；之后可以通过 frames.name(seq) 取到这一帧"""
+        seq = self.frames.put(data, loader)
+        if data is not None:
+            self.publish("res.png", data, CONTENT_TYPES[".png"])
+        else:
+            self.publish_lazy("res.png", lambda: self.frames.get(seq), CONTENT_TYPES[".png"])
+        return seq
+
+    def publish_event(self, name, payload):
+        """推送一条指令给 viewer，不产生任何资源"""
+        with self._changed:
+            self._version += 1
+            self.events[name] = (self._version, payload)
+            self._changed.notify_all()
+
+    def remove(self, name):
+        with self._changed:
+            self._loaders.pop(name, None)
+            self.resources.pop(name, None)
+            self.versions.pop(name, None)
+
+    def get(self, name):
+        """返回 (data, etag, content_type)，不存在时返回 None"""
+        resource = self.resources.get(name)
+        if resource is not None or name not in self._loaders:
+            return resource
+
+        with self._load_lock:
+            pending = self._loaders.get(name)
+            if pending is None:
+                return self.resources.get(name)
+            loader, etag, content_type = pending
+            data = loader()
+            with self._changed:
+                # 生成期间可能已经发布了新版本，只在版本未变时缓存
+                if self._loaders.get(name) is pending:
+                    del self._loaders[name]
+                    self.resources[name] = (data, etag, content_type)
+            return (data, etag, content_type)
+
+    @property
+    def seq(self):
+        """当前的发布序号"""
+        return self._version
+
+    def changes_since(self, since):
+        """返回 {"epoch", "seq": 当前序号, "changed": [since 之后发布过的资源], "events": {name: payload}}"""
+        with self._changed:
+            changed = [name for name, version in self.versions.items() if version > since]
+            events = {name: payload for name, (version, payload) in self.events.items() if version > since}
+            return {"epoch": self.epoch, "seq": self._version, "changed": changed, "events": events}
+
+    def is_stale(self, since, epoch=None):
+        """客户端的序号来自上一次运行（epoch 不同，或比当前序号还大），需要整页重新加载"""
+        return (epoch is not None and epoch != self.epoch) or since > self._version
+
+    def wait_for_change(self, since, timeout, epoch=None):
+        """阻塞直到序号超过 since 或超时，用于长轮询和 SSE；客户端过期时立即返回"""
+        with self._changed:
+            self._changed.wait_for(lambda: self._version > since or self.is_stale(since, epoch), timeout)
+        return self.changes_since(since)
+
+    def start(self):
+        """在独立线程中启动 HTTP 服务"""
+        if self._httpd is not None:
+            return
+
+        server = self
+
+        class Handler(_FrameRequestHandler):
+            frame_server = server
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"Frame server listening on http://{self.host}:{self.port}")
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+
+class _FrameRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 默认 keep-alive，e-ink 浏览器复用同一个连接
+    protocol_version = "HTTP/1.1"
+    frame_server = None
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body):
+        url = urlsplit(self.path)
+        name = url.path.lstrip("/") or "index.html"
+        query = parse_qs(url.query)
+
+        if name == "seq.js":
+            server = self.frame_server
+            self._send_dynamic(f'var seq = {server.seq};\nvar epoch = "{server.epoch}";', CONTENT_TYPES[".js"], send_body)
+            return
+        if name == "poll":
+            since = self._since(query)
+            changes = self.frame_server.wait_for_change(since, self.frame_server.poll_timeout, self._epoch(query))
+            self._send_dynamic(json.dumps(changes), "application/json", send_body)
+            return
+        if name == "events":
+            self._stream_events(self._since(query), self._epoch(query))
+            return
+
+        match = FRAME_NAME.fullmatch(name)
+        if match:
+            resource = None
+            data = None
+            if match.group(1) == self.frame_server.epoch:
+                data = self.frame_server.frames.get(int(match.group(2)))
+            if data is not None:
+                resource = (data, f'"{name}"', CONTENT_TYPES[".png"])
+        else:
+            resource = self.frame_server.get(name)
+
+        if resource is None or resource[0] is None:
+            self.send_error(404)
+            return
+
+        # 版本化的帧内容不会变化，可以长期缓存；其余资源每次都向服务器确认，命中时只回 304
+        cache = "max-age=31536000, immutable" if match else "no-cache"
+        self._send_resource(*resource, cache, send_body)
+
+    def _send_resource(self, data, etag, content_type, cache, send_body):
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", cache)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def _since(self, query):
+        # EventSource 断线重连时通过 Last-Event-ID 带回最后收到的序号
+        value = self.headers.get("Last-Event-ID") or query.get("since", ["-1"])[0]
+        try:
+            return int(value)
+        except ValueError:
+            return -1
+
+    def _epoch(self, query):
+        return query.get("epoch", [None])[0]
+
+    def _send_dynamic(self, body, content_type, send_body):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def _stream_events(self, since, epoch=None):
+        """Server-Sent Events: 每次发布推送一条 {"epoch", "seq", "changed"}"""
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        try:
+            while True:
+                changes = self.frame_server.wait_for_change(since, self.frame_server.heartbeat, epoch)
+                if self.frame_server.is_stale(since, epoch):
+                    # 服务重启过：推送一次当前 epoch，viewer 收到后整页重新加载
+                    since, epoch = changes["seq"], None
+                    message = f"id: {since}\ndata: {json.dumps(changes)}\n\n"
+                elif changes["seq"] > since:
+                    since = changes["seq"]
+                    message = f"id: {since}\ndata: {json.dumps(changes)}\n\n"
+                else:
+                    message = ": heartbeat\n\n"
+                self.wfile.write(message.encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
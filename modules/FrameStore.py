@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+import os
+import threading
+from collections import OrderedDict
+
+
+class FrameStore:
+    """版本化帧存储 - 每一帧有独立的序号，只保留最近 keep 帧
+
+    帧数据可以直接给出，也可以给一个 loader，在第一次读取时才编码。
+    帧名为 res.<epoch>.<seq>.png，epoch 由调用方给出（每个进程不同），重启后序号重新计数也不会
+    和浏览器里长期缓存的旧帧重名。
+    设置 directory 时同时在磁盘上按帧名镜像，并原子地把 res.png
+    指向最新一帧（写临时文件 + os.replace，不 fork 任何进程，读者不会读到半个文件）。
+    """
+
+    def __init__(self, keep=4, directory=None, prefix="res", ext=".png", epoch=None):
+        self.keep = keep
+        self.directory = directory
+        self.prefix = prefix
+        self.ext = ext
+        self.epoch = epoch if epoch is not None else os.urandom(4).hex()
+        self.seq = 0
+        self._frames = OrderedDict()  # seq -> bytes 或 loader
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._remove_stale()
+
+    def name(self, seq):
+        return f"{self.prefix}.{self.epoch}.{seq}{self.ext}"
+
+    def put(self, data=None, loader=None):
+        """保存新的一帧，返回它的序号"""
+        with self._lock:
+            self.seq += 1
+            seq = self.seq
+            self._frames[seq] = data if data is not None else loader
+            dropped = []
+            while len(self._frames) > self.keep:
+                dropped.append(self._frames.popitem(last=False)[0])
+
+        if self.directory:
+            # 磁盘镜像需要真实数据，lazy 帧在这里立即编码
+            self._write(seq, self.get(seq))
+            for old in dropped:
+                self._unlink(self.name(old))
+        return seq
+
+    def get(self, seq=None):
+        """读取某一帧（默认最新帧），已被回收时返回 None"""
+        with self._lock:
+            if seq is None:
+                seq = self.seq
+            entry = self._frames.get(seq)
+        if entry is None or isinstance(entry, bytes):
+            return entry
+
+        with self._load_lock:
+            with self._lock:
+                entry = self._frames.get(seq)
+            if entry is None or isinstance(entry, bytes):
+                return entry
+            data = entry()
+            with self._lock:
+                if seq in self._frames:
+                    self._frames[seq] = data
+            return data
+
+    def __contains__(self, seq):
+        return seq in self._frames
+
+    def _write(self, seq, data):
+        if data is None:
+            return
+        path = os.path.join(self.directory, self.name(seq))
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as file:
+            file.write(data)
+        os.replace(tmp, path)
+
+        # 硬链接到临时名后再 replace，res.png 总是指向一个完整的文件
+        current = os.path.join(self.directory, self.prefix + self.ext)
+        link = current + ".tmp"
+        try:
+            os.unlink(link)
+        except FileNotFoundError:
+            pass
+        os.link(path, link)
+        os.replace(link, current)
+
+    def _remove_stale(self):
+        """删除之前运行留下的帧镜像（epoch 不同，不会再被引用）"""
+        current = f"{self.prefix}.{self.epoch}."
+        for name in os.listdir(self.directory):
+            if name.startswith(self.prefix + ".") and name.endswith(self.ext) \
+                    and name.count(".") == 3 and not name.startswith(current):
+                self._unlink(name)
+
+    def _unlink(self, name):
+        try:
+            os.unlink(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+import threading
+
+from pynput import keyboard, mouse
+
+# 左右修饰键合并成一个名字，组合键里写 "alt" 即可匹配 alt_l / alt_r / alt_gr
+MODIFIERS = {
+    "alt_l": "alt", "alt_r": "alt", "alt_gr": "alt",
+    "shift_l": "shift", "shift_r": "shift",
+    "ctrl_l": "ctrl", "ctrl_r": "ctrl",
+    "cmd_l": "cmd", "cmd_r": "cmd",
+}
+
+
+def key_name(key):
+    """pynput 的按键对象 -> 统一的小写名字；无法识别时返回 None"""
+    char = getattr(key, "char", None)
+    if char:
+        return char.lower()
+    name = getattr(key, "name", None)
+    if name is None:
+        return None
+    return MODIFIERS.get(name, name)
+
+
+def compile_combo(combo):
+    """把 "alt + shift + m" 编译成 frozenset({"alt", "shift", "m"})，注册时做一次"""
+    return frozenset(MODIFIERS.get(k, k) for k in (part.strip().lower() for part in combo.split("+")) if k)
+
+
+class InputHub:
+    """进程内唯一的键盘、鼠标监听器，把事件分发给订阅者
+
+    每个 pynput 监听器在 X11 上都占一个 RECORD 连接和一个线程，所以全程序只开一对。
+    当前按下的键保存为 frozenset（chord），组合键预先编译成 frozenset，匹配只是一次集合包含判断。
+    """
+
+    EVENTS = ("press", "release", "click", "scroll", "move")
+
+    def __init__(self):
+        self._subscribers = {event: [] for event in self.EVENTS}
+        self._pressed = set()
+        self.chord = frozenset()
+        self._keyboard = None
+        self._mouse = None
+        self._lock = threading.Lock()
+
+    def on(self, event, callback):
+        """订阅事件：press/release(name, key)、click(x, y, button, pressed)、scroll(x, y, dx, dy)、move(x, y)
+
+        回调在监听线程中执行，应尽快返回。
+        """
+        with self._lock:
+            # 复制后替换，分发时不需要加锁
+            self._subscribers[event] = self._subscribers[event] + [callback]
+
+    def held(self, chord):
+        """chord（compile_combo 的结果）中的键是否都按着"""
+        return chord <= self.chord
+
+    def _emit(self, event, *args):
+        for callback in self._subscribers[event]:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in {event} handler {getattr(callback, '__name__', callback)}: {e}")
+
+    def _on_press(self, key):
+        name = key_name(key)
+        if name is None:
+            return
+        if name not in self._pressed:
+            self._pressed.add(name)
+            self.chord = frozenset(self._pressed)
+        self._emit("press", name, key)
+
+    def _on_release(self, key):
+        name = key_name(key)
+        if name is None:
+            return
+        if name in self._pressed:
+            self._pressed.discard(name)
+            self.chord = frozenset(self._pressed)
+        self._emit("release", name, key)
+
+    def _on_click(self, x, y, button, pressed):
+        self._emit("click", x, y, button, pressed)
+
+    def _on_scroll(self, x, y, dx, dy):
+        self._emit("scroll", x, y, dx, dy)
+
+    def _on_move(self, x, y):
+        self._emit("move", x, y)
+
+    def start(self):
+        if self._keyboard is not None:
+            return
+        self._keyboard = keyboard.Listener(on_press=self._on_press, on_release=self._on_release)
+        self._mouse = mouse.Listener(on_click=self._on_click, on_scroll=self._on_scroll, on_move=self._on_move)
+        self._keyboard.start()
+        self._mouse.start()
+
+    def join(self):
+        if self._mouse is not None:
+            self._mouse.join()
+
+    def stop(self):
+        for listener in (self._keyboard, self._mouse):
+            if listener is not None:
+                listener.stop()
+        self._keyboard = self._mouse = None
@@ -1,38 +1,31 @@
-import threading
 import time
-from pynput import keyboard
+
+from modules.InputHub import compile_combo
 
 class KeyEvent():
-    def __init__(self) -> None:
-        threading.Thread(target=self.listen).start()
+    def __init__(self, hub) -> None:
+        """按键绑定表，按键事件来自共享的 InputHub（不再单独开键盘监听器）"""
+        self.hub = hub
         self.keyMaps = {}
         self.doubleTapMaps = {}
-        self.comboMaps = {}
+        self.comboMaps = {}  # frozenset(组合键) -> [callback]
+        self.comboIndex = {}  # 键 -> 含有这个键的组合键
         self.lastKeyTime = {}
         self.doubleTapWindow = 0.3  # 300ms window for double tap
-        self.pressed_keys = set()
-        pass
-
-    def on_press(self, key):
-        try:
-            k = key.char.lower() if key.char else None  # single-char keys, normalize to lowercase
-        except:
-            k = getattr(key, 'name', str(key))  # other keys, handle KeyCode objects
+        hub.on("press", self.on_press)
 
-        if k:
-            self.pressed_keys.add(k)
-        
+    def on_press(self, k, key=None):
         current_time = time.time()
 
-        # Handle combo keys
-        for combo_key, callbacks in self.comboMaps.items():
-            if self.is_combo_pressed(combo_key):
-                print(f"Combo pressed: {combo_key}")
-                for callback in callbacks:
+        # Handle combo keys: 只检查包含刚按下的键的组合，每个是一次集合包含判断
+        for combo in self.comboIndex.get(k, ()):
+            if self.hub.held(combo):
+                print(f"Combo pressed: {'+'.join(sorted(combo))}")
+                for callback in self.comboMaps[combo]:
                     callback()
 
         # Handle double tap detection
-        if k and k in self.doubleTapMaps:
+        if k in self.doubleTapMaps:
             if k in self.lastKeyTime:
                 time_diff = current_time - self.lastKeyTime[k]
                 if time_diff <= self.doubleTapWindow:
@@ -45,47 +38,12 @@ class KeyEvent():
 
             self.lastKeyTime[k] = current_time
 
-        if k and k in self.keyMaps:
+        if k in self.keyMaps:
             print("Keydown: ", k)
 
             for callback in self.keyMaps[k]:
                 callback()
 
-    def on_release(self, key):
-        try:
-            k = key.char.lower() if key.char else None  # single-char keys, normalize to lowercase
-        except:
-            k = getattr(key, 'name', str(key))  # other keys, handle KeyCode objects
-
-        if k:
-            self.pressed_keys.discard(k)
-
-    def is_combo_pressed(self, combo_key):
-        """Check if a combo key is pressed"""
-        keys = combo_key.split("+")
-        for key in keys:
-            key = key.strip().lower()
-            # Handle alt key mapping
-            if key == "alt":
-                alt_pressed = ("alt_l" in self.pressed_keys or "alt_r" in self.pressed_keys or "alt" in self.pressed_keys)
-                if not alt_pressed:
-                    return False
-            # Handle shift key mapping  
-            elif key == "shift":
-                shift_pressed = ("shift" in self.pressed_keys or "shift_r" in self.pressed_keys)
-                if not shift_pressed:
-                    return False
-            # Handle ctrl key mapping
-            elif key == "ctrl":
-                ctrl_pressed = ("ctrl_l" in self.pressed_keys or "ctrl_r" in self.pressed_keys)
-                if not ctrl_pressed:
-                    return False
-            else:
-                key_pressed = key in self.pressed_keys
-                if not key_pressed:
-                    return False
-        return True
-
     def on(self, key, callback):
         if key not in self.keyMaps:
             self.keyMaps[key] = []
@@ -97,11 +55,9 @@ class KeyEvent():
         self.doubleTapMaps[key].append( callback )
 
     def onCombo(self, combo_key, callback):
-        if combo_key not in self.comboMaps:
-            self.comboMaps[combo_key] = []
-        self.comboMaps[combo_key].append( callback )
-
-    def listen(self):
-        listener = keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
-        listener.start()
-        listener.join()
\ No newline at end of file
+        combo = compile_combo(combo_key)
+        if combo not in self.comboMaps:
+            self.comboMaps[combo] = []
+            for k in combo:
+                self.comboIndex.setdefault(k, []).append(combo)
+        self.comboMaps[combo].append( callback )
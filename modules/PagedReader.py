@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+
+import os
+import mmap
+import threading
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+from modules.utils import worker
+
+
+class PagedReader:
+    """按页读取大文本文件 - mmap 映射文件，页索引在后台线程中逐块建立
+
+    一页是 page_chars 个字符（UTF-8）。打开文件只做 mmap，不读内容；索引只记录每页起点的
+    字节偏移。读取某页后在后台工作线程里预取相邻的页，翻页时通常直接命中缓存。
+    """
+
+    CHUNK = 1 << 20
+
+    def __init__(self, path=None, page_chars=260, cache_pages=8):
+        self.page_chars = page_chars
+        self.cache_pages = cache_pages
+        self.path = None
+        self.size = 0
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._file = None
+        self._mm = None
+        self._offsets = array("q", [0])
+        self._done = True
+        self._cache = OrderedDict()  # 页号 -> 文本
+
+        if path:
+            self.open(path)
+
+    def open(self, path):
+        """切换到另一个文件，立即返回，索引在后台建立"""
+        file = open(path, "rb")
+        size = os.fstat(file.fileno()).st_size
+        mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+        with self._cond:
+            self._close()
+            self._generation += 1
+            generation = self._generation
+            self.path, self.size = path, size
+            self._file, self._mm = file, mm
+            self._offsets = array("q", [0])
+            self._done = size == 0
+            self._cache.clear()
+            self._cond.notify_all()
+
+        if size:
+            threading.Thread(target=self._build_index, args=(generation, mm, size),
+                             name="page-index", daemon=True).start()
+
+    def _build_index(self, generation, mm, size):
+        """扫描 UTF-8 首字节（非 10xxxxxx），每 page_chars 个字符记一次字节偏移"""
+        chars = 0
+        for pos in range(0, size, self.CHUNK):
+            try:
+                # 复制出一块再交给 numpy，避免导出 mmap 的缓冲区导致它无法关闭
+                chunk = np.frombuffer(mm[pos:pos + self.CHUNK], dtype=np.uint8)
+            except ValueError:
+                return  # 已经切换到别的文件，mmap 被关闭
+            leads = np.flatnonzero((chunk & 0xC0) != 0x80)
+            starts = leads[(-chars) % self.page_chars::self.page_chars] + pos
+            chars += len(leads)
+
+            with self._cond:
+                if generation != self._generation:
+                    return
+                self._offsets.extend(starts[starts > 0].tolist())
+                self._cond.notify_all()
+
+        with self._cond:
+            if generation == self._generation:
+                self._done = True
+                self._cond.notify_all()
+
+    @property
+    def pages(self):
+        """目前已知的页数（索引完成前会继续增长）"""
+        return len(self._offsets)
+
+    @property
+    def indexed(self):
+        return self._done
+
+    def page(self, n, wait=True):
+        """第 n 页的文本；超出文件末尾时返回空字符串"""
+        with self._cond:
+            text = self._cache.get(n)
+            if text is not None:
+                self._cache.move_to_end(n)
+                return text
+
+            # 需要第 n+1 页的起点作为本页的终点
+            while wait and n + 1 >= len(self._offsets) and not self._done:
+                self._cond.wait()
+            if n < 0 or n >= len(self._offsets) or (n + 1 >= len(self._offsets) and not self._done) or not self.size:
+                return ""
+
+            start = self._offsets[n]
+            end = self._offsets[n + 1] if n + 1 < len(self._offsets) else self.size
+            text = self._mm[start:end].decode("utf-8", "replace")
+            self._cache[n] = text
+            while len(self._cache) > self.cache_pages:
+                self._cache.popitem(last=False)
+            generation = self._generation
+
+        if wait:
+            worker.submit(self._prefetch, generation, (n + 1, n - 1))
+        return text
+
+    def _prefetch(self, generation, pages):
+        for n in pages:
+            if generation != self._generation:
+                return
+            if n >= 0:
+                self.page(n, wait=False)
+
+    def _close(self):
+        if self._mm is not None:
+            self._mm.close()
+        if self._file is not None:
+            self._file.close()
+        self._mm = self._file = None
+
+    def close(self):
+        with self._cond:
+            self._generation += 1
+            self._close()
+            self._offsets = array("q", [0])
+            self._done = True
+            self._cache.clear()
+            self._cond.notify_all()
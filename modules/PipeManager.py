@@ -1,13 +1,22 @@
 #!/usr/bin/env python
 
 import os
-import time
+import errno
 import select
 import threading
 
 
 class PipeManager:
-    """管道通信管理器 - 处理命名管道的创建、监听和状态反馈"""
+    """管道通信管理器 - 处理命名管道的创建、监听和状态反馈
+
+    命令管道和状态管道都按行分帧。监听线程阻塞在 epoll 上，没有命令时不唤醒；读到的数据先放进
+    缓冲区，只处理完整的行，半行留到下次读取。状态管道的写端打开后一直保持，读者读得慢时
+    多出的行留在有上限的缓冲里，等 epoll 报告可写再继续写。
+    """
+
+    READ_SIZE = 65536
+    MAX_LINE = 65536  # 超过这个长度还没有换行的数据直接丢弃
+    STATUS_BUFFER = 65536  # 状态缓冲上限，超过时丢弃最旧的行
 
     def __init__(self, command_path="/tmp/eink_control", status_path="/tmp/eink_status"):
         self.command_path = command_path
@@ -15,6 +24,18 @@ class PipeManager:
         self.command_handlers = {}
         self._listening = False
         self._listener_thread = None
+        self._skip_line = False  # 正在丢弃一条过长的行，直到下一个换行
+        self._epoll = None
+        self._wakeup = None  # (读端, 写端)，用来唤醒 epoll 退出
+        self._status_lock = threading.Lock()
+        self._status_fd = None
+        self._status_pending = bytearray()
+        self._status_watched = False
+        self.commands = 0
+        self.dropped_status = 0
+        # 命令执行完后调用 on_command(command, result)，用于推送状态变化
+        self.on_command = None
+        self._local = threading.local()  # 执行命令期间收集 write_status 的输出
 
     def create_pipes(self):
         """创建命名管道"""
@@ -47,61 +68,187 @@ class PipeManager:
         self.command_handlers.update(command_dict)
 
     def write_status(self, status):
-        """写入状态信息到状态管道（非阻塞）"""
+        """写入一行状态（非阻塞）；没有读者时丢弃"""
+        captured = getattr(self._local, "status", None)
+        if captured is not None:
+            captured.append(status)
+        data = (status + "\n").encode("utf-8")
+        with self._status_lock:
+            if self._status_fd is None and not self._open_status():
+                return
+            self._queue_status(data)
+            if not self._flush_status():
+                # 原来的读者已经关闭（EPIPE）：旧缓冲作废，换新读者后只重发这一行
+                if self._open_status():
+                    self._queue_status(data)
+                    self._flush_status()
+
+    def _open_status(self):
         try:
-            # Use non-blocking write to avoid hanging if no reader
-            fd = os.open(self.status_path, os.O_WRONLY | os.O_NONBLOCK)
-            os.write(fd, (status + '\n').encode('utf-8'))
-            os.close(fd)
+            self._status_fd = os.open(self.status_path, os.O_WRONLY | os.O_NONBLOCK)
+            return True
         except OSError as e:
-            if e.errno == 32:  # EPIPE - broken pipe (no reader)
-                pass  # Silently ignore if no reader is waiting
-            elif e.errno == 11:  # EAGAIN - would block
-                pass  # Silently ignore if would block
+            if e.errno not in (errno.ENXIO, errno.ENOENT):  # ENXIO: 没有读者
+                print(f"Error opening status pipe: {e}")
+            return False
+
+    def _queue_status(self, data):
+        pending = self._status_pending
+        pending += data
+        if len(pending) > self.STATUS_BUFFER:
+            # 读者跟不上：丢弃最旧的整行
+            cut = pending.find(b"\n", len(pending) - self.STATUS_BUFFER)
+            self.dropped_status += pending.count(b"\n", 0, cut + 1)
+            del pending[:cut + 1]
+
+    def _flush_status(self):
+        """尽量写出缓冲的状态，写不完时让 epoll 等待可写；返回 False 表示读者已关闭"""
+        pending = self._status_pending
+        while pending:
+            try:
+                written = os.write(self._status_fd, pending)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno != errno.EPIPE:
+                    print(f"Error writing status: {e}")
+                self._close_status()
+                return False
+            del pending[:written]
+        self._watch_status(bool(pending))
+        return True
+
+    def _watch_status(self, writable):
+        if self._epoll is None or writable == self._status_watched:
+            return
+        if writable:
+            self._epoll.register(self._status_fd, select.EPOLLOUT)
+        else:
+            self._epoll.unregister(self._status_fd)
+        self._status_watched = writable
+
+    def _close_status(self):
+        if self._status_fd is None:
+            return
+        if self._status_watched and self._epoll is not None:
+            self._epoll.unregister(self._status_fd)
+        self._status_watched = False
+        os.close(self._status_fd)
+        self._status_fd = None
+        self._status_pending.clear()
+
+    def _on_status_event(self, events):
+        with self._status_lock:
+            if self._status_fd is None:
+                return
+            if events & (select.EPOLLERR | select.EPOLLHUP):
+                self._close_status()
             else:
-                print(f"Error writing status: {e}")
-        except Exception as e:
-            print(f"Error writing status: {e}")
+                self._flush_status()
 
     def process_command(self, command):
         """处理接收到的命令"""
         print(f"Received command: {command}")
+        result = self.execute(command)
+        if result["error"] == "unknown command":
+            print(f"Unknown command: {command}")
+        elif not result["ok"]:
+            print(f"Error executing command '{command}': {result['error']}")
+
+    def execute(self, command):
+        """执行一条命令，"name arg" 形式的命令把 arg 传给处理器
+
+        返回 {"command", "ok", "status", "error"}，status 是执行期间 write_status 写出的行。
+        """
+        result = {"command": command, "ok": False, "status": [], "error": None}
+        name, _, arg = command.partition(" ")
         if command in self.command_handlers:
-            try:
-                self.command_handlers[command]()
-            except Exception as e:
-                print(f"Error executing command '{command}': {e}")
+            handler, args = self.command_handlers[command], ()
+        elif arg and name in self.command_handlers:
+            handler, args = self.command_handlers[name], (arg.strip(),)
         else:
-            print(f"Unknown command: {command}")
+            result["error"] = "unknown command"
+            return result
+
+        self._local.status = result["status"]
+        try:
+            handler(*args)
+            result["ok"] = True
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            self._local.status = None
+
+        if self.on_command is not None:
+            self.on_command(command, result)
+        return result
+
+    def _open_command_pipe(self):
+        fd = os.open(self.command_path, os.O_RDONLY | os.O_NONBLOCK)
+        self._epoll.register(fd, select.EPOLLIN)
+        return fd
+
+    def _read_commands(self, fd, buf):
+        """读到 EAGAIN 为止并处理完整的行；返回 False 表示所有写端都已关闭"""
+        while True:
+            try:
+                chunk = os.read(fd, self.READ_SIZE)
+            except BlockingIOError:
+                return True
+            if not chunk:
+                return False
+            buf += chunk
+            end = buf.rfind(b"\n")
+            if end >= 0:
+                lines = bytes(buf[:end]).split(b"\n")
+                del buf[:end + 1]
+                if self._skip_line:
+                    lines = lines[1:]
+                    self._skip_line = False
+                for line in lines:
+                    # 换行可能在下一次读取时才到，完整的行也要检查长度
+                    if len(line) > self.MAX_LINE:
+                        print(f"Dropping a command pipe line longer than {self.MAX_LINE} bytes")
+                        continue
+                    self._dispatch(line)
+            if len(buf) > self.MAX_LINE:
+                # 丢掉已经超长的前半行，直到下一个换行
+                print(f"Dropping a command pipe line longer than {self.MAX_LINE} bytes")
+                buf.clear()
+                self._skip_line = True
+
+    def _dispatch(self, line):
+        command = line.decode("utf-8", "replace").strip()
+        if command:
+            self.commands += 1
+            self.process_command(command)
 
     def listen_for_commands(self):
         """监听来自命名管道的命令"""
         pipe_fd = None
+        buf = bytearray()
         try:
-            # Open pipe once outside the loop
-            pipe_fd = os.open(self.command_path, os.O_RDONLY | os.O_NONBLOCK)
+            pipe_fd = self._open_command_pipe()
             print(f"Opened pipe for listening: {self.command_path}")
 
             while self._listening:
-                try:
-                    # Use select to check if data is available
-                    ready, _, _ = select.select([pipe_fd], [], [], 0.1)
-                    if ready:
-                        data = os.read(pipe_fd, 1024).decode('utf-8')
-                        if data:
-                            # Process each line as a separate command
-                            for line in data.strip().split('\n'):
-                                command = line.strip()
-                                if command:
-                                    self.process_command(command)
-                    time.sleep(0.01)  # Very short sleep for responsiveness
-
-                except OSError as e:
-                    if e.errno == 11:  # EAGAIN - no data available
-                        time.sleep(0.1)
-                        continue
+                for fd, events in self._epoll.poll():
+                    if fd == pipe_fd:
+                        if not self._read_commands(fd, buf):
+                            # 写端都关闭了：没有换行结尾的最后一条也算一条命令（echo -n、旧脚本）
+                            if not self._skip_line:
+                                self._dispatch(bytes(buf))
+                            buf.clear()
+                            self._skip_line = False
+                            # 重新打开，否则 epoll 会一直报告 EPOLLHUP
+                            self._epoll.unregister(pipe_fd)
+                            os.close(pipe_fd)
+                            pipe_fd = None  # 重新打开失败时 finally 不再关闭
+                            pipe_fd = self._open_command_pipe()
+                    elif fd == self._wakeup[0]:
+                        os.read(fd, 64)
                     else:
-                        raise e
+                        self._on_status_event(events)
 
         except Exception as e:
             print(f"Error in command listener: {e}")
@@ -110,13 +257,20 @@ class PipeManager:
                 try:
                     os.close(pipe_fd)
                     print("Closed command pipe")
-                except:
+                except OSError:
                     pass
 
     def start_listening(self):
         """开始监听命令（在独立线程中）"""
         if not self._listening:
             self._listening = True
+            self._epoll = select.epoll()
+            self._wakeup = os.pipe()
+            os.set_blocking(self._wakeup[0], False)
+            self._epoll.register(self._wakeup[0], select.EPOLLIN)
+            with self._status_lock:
+                if self._status_fd is not None:
+                    self._flush_status()
             self._listener_thread = threading.Thread(target=self.listen_for_commands, daemon=True)
             self._listener_thread.start()
             print("Started command listener thread")
@@ -125,6 +279,14 @@ class PipeManager:
         """停止监听命令"""
         if self._listening:
             self._listening = False
+            os.write(self._wakeup[1], b"\0")
             if self._listener_thread:
                 self._listener_thread.join(timeout=1)
-            print("Stopped command listener")
\ No newline at end of file
+            with self._status_lock:
+                self._close_status()
+                self._epoll.close()
+                self._epoll = None
+            for fd in self._wakeup:
+                os.close(fd)
+            self._wakeup = None
+            print("Stopped command listener")
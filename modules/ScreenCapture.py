@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+
+import os
+import threading
+from ctypes import (CDLL, CFUNCTYPE, POINTER, Structure, byref, c_char_p, c_int,
+                    c_size_t, c_ubyte, c_uint, c_ulong, c_void_p)
+from ctypes.util import find_library
+
+from PIL import ImageGrab, Image
+
+from modules import screens
+
+
+class XImage(Structure):
+    # 只声明用得到的前半部分字段，始终通过指针访问
+    _fields_ = [
+        ("width", c_int), ("height", c_int), ("xoffset", c_int), ("format", c_int),
+        ("data", c_void_p), ("byte_order", c_int), ("bitmap_unit", c_int),
+        ("bitmap_bit_order", c_int), ("bitmap_pad", c_int), ("depth", c_int),
+        ("bytes_per_line", c_int), ("bits_per_pixel", c_int),
+        ("red_mask", c_ulong), ("green_mask", c_ulong), ("blue_mask", c_ulong),
+    ]
+
+
+class XShmSegmentInfo(Structure):
+    _fields_ = [("shmseg", c_ulong), ("shmid", c_int), ("shmaddr", c_void_p), ("readOnly", c_int)]
+
+
+ZPixmap = 2
+AllPlanes = 0xFFFFFFFF
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+XErrorHandler = CFUNCTYPE(c_int, c_void_p, c_void_p)
+
+
+def _load_libs():
+    x11 = CDLL(find_library("X11"))
+    xext = CDLL(find_library("Xext"))
+    libc = CDLL(find_library("c"), use_errno=True)
+
+    x11.XOpenDisplay.argtypes = [c_char_p]
+    x11.XOpenDisplay.restype = c_void_p
+    x11.XCloseDisplay.argtypes = [c_void_p]
+    x11.XDefaultScreen.argtypes = [c_void_p]
+    x11.XRootWindow.argtypes = [c_void_p, c_int]
+    x11.XRootWindow.restype = c_ulong
+    x11.XDefaultVisual.argtypes = [c_void_p, c_int]
+    x11.XDefaultVisual.restype = c_void_p
+    x11.XDefaultDepth.argtypes = [c_void_p, c_int]
+    x11.XDisplayWidth.argtypes = [c_void_p, c_int]
+    x11.XDisplayHeight.argtypes = [c_void_p, c_int]
+    x11.XSync.argtypes = [c_void_p, c_int]
+    x11.XDestroyImage.argtypes = [POINTER(XImage)]
+    x11.XSetErrorHandler.argtypes = [XErrorHandler]
+    x11.XSetErrorHandler.restype = XErrorHandler
+
+    xext.XShmQueryExtension.argtypes = [c_void_p]
+    xext.XShmCreateImage.argtypes = [c_void_p, c_void_p, c_uint, c_int, c_char_p,
+                                     POINTER(XShmSegmentInfo), c_uint, c_uint]
+    xext.XShmCreateImage.restype = POINTER(XImage)
+    xext.XShmAttach.argtypes = [c_void_p, POINTER(XShmSegmentInfo)]
+    xext.XShmDetach.argtypes = [c_void_p, POINTER(XShmSegmentInfo)]
+    xext.XShmGetImage.argtypes = [c_void_p, c_ulong, POINTER(XImage), c_int, c_int, c_ulong]
+
+    libc.shmget.argtypes = [c_int, c_size_t, c_int]
+    libc.shmat.argtypes = [c_int, c_void_p, c_int]
+    libc.shmat.restype = c_void_p
+    libc.shmdt.argtypes = [c_void_p]
+    libc.shmctl.argtypes = [c_int, c_int, c_void_p]
+
+    return x11, xext, libc
+
+
+class ShmBackend:
+    """MIT-SHM 截图后端 - 持有一个 X 连接和一块与捕获区域同尺寸的共享内存"""
+
+    # Xlib 的错误处理器是进程全局的（wx/GTK 也会设置），所以只处理自己的连接，其余交给原处理器
+    _errors = {}
+    _prev_handler = None
+    _handler = None
+
+    def __init__(self):
+        self.x11, self.xext, self.libc = _load_libs()
+
+        self.dpy = self.x11.XOpenDisplay(None)
+        if not self.dpy:
+            raise OSError("Cannot open X display")
+        self._install_error_handler(self.x11)
+        self._errors[self.dpy] = False
+
+        if not self.xext.XShmQueryExtension(self.dpy):
+            self.close()
+            raise OSError("MIT-SHM extension not available")
+
+        screen = self.x11.XDefaultScreen(self.dpy)
+        self.root = self.x11.XRootWindow(self.dpy, screen)
+        self.visual = self.x11.XDefaultVisual(self.dpy, screen)
+        self.depth = self.x11.XDefaultDepth(self.dpy, screen)
+        self.image = None
+        self.shminfo = None
+        self.size = None
+
+    @classmethod
+    def _install_error_handler(cls, x11):
+        if cls._handler is not None:
+            return
+
+        def handler(dpy, event):
+            if dpy in cls._errors:
+                cls._errors[dpy] = True
+                return 0
+            if cls._prev_handler:
+                return cls._prev_handler(dpy, event)
+            return 0
+
+        cls._handler = XErrorHandler(handler)
+        cls._prev_handler = x11.XSetErrorHandler(cls._handler)
+
+    def _check(self, what):
+        """XSync 后检查这个连接上是否出现过 X 错误"""
+        self.x11.XSync(self.dpy, 0)
+        if self._errors.get(self.dpy):
+            self._errors[self.dpy] = False
+            raise OSError(f"X error during {what}")
+
+    def _alloc(self, size):
+        self._free()
+        w, h = size
+
+        shminfo = XShmSegmentInfo()
+        image = self.xext.XShmCreateImage(self.dpy, self.visual, self.depth, ZPixmap, None, byref(shminfo), w, h)
+        if not image:
+            raise OSError("XShmCreateImage failed")
+        # 只处理小端 32bpp 的 BGRX（常见的 24/32 位 TrueColor）
+        ximage = image.contents
+        if ximage.bits_per_pixel != 32 or ximage.byte_order != 0 or ximage.red_mask != 0xFF0000:
+            self.x11.XDestroyImage(image)
+            raise OSError(f"Unsupported pixel format: {ximage.bits_per_pixel} bpp")
+
+        shminfo.shmid = self.libc.shmget(IPC_PRIVATE, image.contents.bytes_per_line * h, IPC_CREAT | 0o600)
+        if shminfo.shmid < 0:
+            self.x11.XDestroyImage(image)
+            raise OSError("shmget failed")
+        shminfo.shmaddr = self.libc.shmat(shminfo.shmid, None, 0)
+        if shminfo.shmaddr in (None, c_void_p(-1).value):
+            self.libc.shmctl(shminfo.shmid, IPC_RMID, None)
+            self.x11.XDestroyImage(image)
+            raise OSError("shmat failed")
+        image.contents.data = shminfo.shmaddr
+        shminfo.readOnly = 0
+
+        self.image, self.shminfo, self.size = image, shminfo, size
+        self.xext.XShmAttach(self.dpy, byref(shminfo))
+        try:
+            self._check("XShmAttach")
+        finally:
+            # 标记删除：双方都 detach 后内核自动回收，进程崩溃也不会泄漏
+            self.libc.shmctl(shminfo.shmid, IPC_RMID, None)
+
+    def _free(self):
+        if self.image is None:
+            return
+        self.xext.XShmDetach(self.dpy, byref(self.shminfo))
+        self.x11.XSync(self.dpy, 0)
+        # XShmCreateImage 的 destroy 不会释放 data，共享内存需要自己 detach
+        self.x11.XDestroyImage(self.image)
+        self.libc.shmdt(self.shminfo.shmaddr)
+        self.image, self.shminfo, self.size = None, None, None
+
+    def grab_buffer(self, bbox):
+        """抓取 bbox 到复用的共享内存，返回 (buffer, size, stride)，buffer 为 BGRX
+
+        buffer 指向共享内存，下次抓取会被覆盖。
+        """
+        x0, y0, x1, y1 = bbox
+        size = (x1 - x0, y1 - y0)
+        if size != self.size:
+            self._alloc(size)
+
+        if not self.xext.XShmGetImage(self.dpy, self.root, self.image, x0, y0, AllPlanes):
+            raise OSError("XShmGetImage failed")
+
+        stride = self.image.contents.bytes_per_line
+        buf = (c_ubyte * (stride * size[1])).from_address(self.shminfo.shmaddr)
+        return buf, size, stride
+
+    def close(self):
+        self._free()
+        if self.dpy:
+            self._errors.pop(self.dpy, None)
+            self.x11.XCloseDisplay(self.dpy)
+            self.dpy = None
+
+
+class ScreenCapture:
+    """截图入口 - 优先使用 MIT-SHM，不可用时退回 PIL.ImageGrab"""
+
+    def __init__(self, use_shm=True):
+        self._lock = threading.Lock()
+        self.backend = None
+        if use_shm and os.environ.get("DISPLAY"):
+            try:
+                self.backend = ShmBackend()
+                print("Screen capture: MIT-SHM")
+            except Exception as e:
+                print(f"MIT-SHM capture unavailable, falling back to ImageGrab: {e}")
+        self.use_shm = self.backend is not None
+
+    def grab(self, bbox):
+        """抓取屏幕区域，返回 RGB 图像；超出屏幕的部分补黑"""
+        with self._lock:
+            inner = screens.clamp(bbox) if self.backend is not None else None
+            if inner is not None:
+                try:
+                    buf, size, stride = self.backend.grab_buffer(inner)
+                    # BGRX -> RGB 解码时复制一份，之后共享内存可以被下一次抓取复用
+                    image = Image.frombuffer("RGB", size, buf, "raw", "BGRX", stride, 1)
+                    if inner == tuple(bbox):
+                        return image
+                    canvas = Image.new("RGB", (bbox[2] - bbox[0], bbox[3] - bbox[1]))
+                    canvas.paste(image, (inner[0] - bbox[0], inner[1] - bbox[1]))
+                    image.close()
+                    return canvas
+                except OSError as e:
+                    print(f"MIT-SHM grab failed, falling back to ImageGrab: {e}")
+                    self.backend.close()
+                    self.backend = None
+                    self.use_shm = False
+
+        # 没有 MIT-SHM 时交给 ImageGrab（整屏截图后裁剪，越界部分补黑）
+        return ImageGrab.grab(bbox=bbox)
+
+    def close(self):
+        with self._lock:
+            if self.backend is not None:
+                self.backend.close()
+                self.backend = None
@@ -3,14 +3,16 @@ import threading
 from PIL import Image
 import numpy as np
 
+from modules import screens
+
 class SelectionWindow(wx.Frame):
     def __init__(self, screenshot, callback):
         self.screenshot = screenshot
         self.callback = callback
 
-        # Get screen size
-        display = wx.Display()
-        screen_width, screen_height = display.GetGeometry().GetSize()
+        # Get screen size (cached RandR topology)
+        monitor = screens.primary()
+        screen_width, screen_height = monitor.w, monitor.h
 
         # Scale image to fit screen while maintaining aspect ratio
         img_width, img_height = screenshot.size
@@ -30,7 +32,7 @@ class SelectionWindow(wx.Frame):
 
         self.SetSize(new_width, new_height)
         # Center the window on screen
-        self.SetPosition(((screen_width - new_width)//2, (screen_height - new_height)//2))
+        self.SetPosition((monitor.x + (screen_width - new_width)//2, monitor.y + (screen_height - new_height)//2))
 
         # Store scale factor for callback
         self.scale_factor = 1/scale
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageFont
+
+from modules.binarize import threshold
+from modules.textnorm import paragraphs
+
+# 与 textnorm 相同的 CJK 区段
+_CJK = "\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef"
+# 一个 CJK 字符、一段非空白非 CJK 字符（英文单词）或一段空白
+_TOKEN = re.compile(f"[{_CJK}]|[^\\s{_CJK}]+|\\s+")
+
+# 没有配置字体时依次尝试（Pillow 会在系统字体目录中查找）
+DEFAULT_FONTS = ("NotoSansCJK-Regular.ttc", "wqy-microhei.ttc", "DejaVuSans.ttf")
+
+
+def load_font(path=None, size=40):
+    for name in ((path,) if path else ()) + DEFAULT_FONTS:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    print("No TrueType font found, using Pillow's default font")
+    return ImageFont.load_default(size)
+
+
+def text_key(text):
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class Document:
+    """一段文本的排版结果，行按需生成（翻到哪页排到哪页）
+
+    key 是文本内容的哈希，同样的文本（再次复制、翻回读过的文件页）对应同一组缓存页面。
+    """
+
+    def __init__(self, renderer, text):
+        self.key = text_key(text)
+        self.renderer = renderer
+        self.lines = []
+        self.done = False
+        self._source = renderer._wrap_all(text)
+        self._lock = threading.Lock()
+
+    def ensure(self, count):
+        """至少排出 count 行（文本更短时排完为止）"""
+        with self._lock:
+            while len(self.lines) < count and not self.done:
+                line = next(self._source, None)
+                if line is None:
+                    self.done = True
+                else:
+                    self.lines.append(line)
+
+    def page_lines(self, n):
+        per_page = self.renderer.lines_per_page
+        self.ensure((n + 1) * per_page + 1)
+        return self.lines[n * per_page:(n + 1) * per_page]
+
+    def last_page(self, n):
+        """第 n 页是否为最后一页"""
+        per_page = self.renderer.lines_per_page
+        self.ensure((n + 1) * per_page + 1)
+        return self.done and len(self.lines) <= (n + 1) * per_page
+
+
+class TextRenderer:
+    """在桌面端把文本排版成设备分辨率的 1-bit 页面
+
+    字符宽度按字缓存，已渲染的页面放在 LRU 里，翻页通常直接命中缓存，设备端不需要重排。
+    """
+
+    def __init__(self, size, font=None, font_size=40, margin=48, line_spacing=1.5, thresh=160, cache_pages=32, cache_docs=8):
+        self.size = tuple(size)
+        self.font = load_font(font, font_size)
+        self.margin = margin
+        self.thresh = thresh
+        self.cache_pages = cache_pages
+        self.cache_docs = cache_docs
+
+        ascent, descent = self.font.getmetrics()
+        self.ascent = ascent
+        self.line_height = int((ascent + descent) * line_spacing)
+        self.line_width = self.size[0] - 2 * margin
+        self.lines_per_page = max((self.size[1] - 2 * margin) // self.line_height, 1)
+
+        self._widths = {}
+        self._docs = OrderedDict()  # 文本哈希 -> Document，已排好的行可以复用
+        self._pages = OrderedDict()  # (文本哈希, 页号) -> Image
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def width(self, s):
+        """字符串宽度，按字符缓存字体的 advance"""
+        widths = self._widths
+        total = 0.0
+        for ch in s:
+            w = widths.get(ch)
+            if w is None:
+                w = widths[ch] = self.font.getlength(ch)
+            total += w
+        return total
+
+    def _wrap(self, paragraph):
+        """把一个段落折成若干行：英文在空白处断行，CJK 字符之间都可以断"""
+        line, line_w = [], 0.0
+        for token in _TOKEN.findall(paragraph):
+            token_w = self.width(token)
+            if line_w + token_w <= self.line_width:
+                line.append(token)
+                line_w += token_w
+                continue
+            if token.isspace():
+                # 行尾的空白直接丢掉
+                continue
+            if line:
+                yield "".join(line).rstrip()
+                line, line_w = [], 0.0
+            if token_w <= self.line_width:
+                line, line_w = [token], token_w
+                continue
+            # 比一整行还长的单词按字符硬断
+            for ch in token:
+                ch_w = self.width(ch)
+                if line_w + ch_w > self.line_width and line:
+                    yield "".join(line)
+                    line, line_w = [], 0.0
+                line.append(ch)
+                line_w += ch_w
+        if line:
+            yield "".join(line).rstrip()
+
+    def _wrap_all(self, text):
+        first = True
+        for paragraph in paragraphs(text):
+            if not first:
+                yield ""  # 段落之间空一行
+            first = False
+            yield from self._wrap(paragraph)
+
+    def document(self, text):
+        """同样的文本返回同一个 Document（最近 cache_docs 个），不用重新排版和渲染"""
+        key = text_key(text)
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is not None:
+                self._docs.move_to_end(key)
+                return doc
+            doc = self._docs[key] = Document(self, text)
+            while len(self._docs) > self.cache_docs:
+                self._docs.popitem(last=False)
+            return doc
+
+    def page(self, doc, n):
+        """第 n 页的 1-bit 图像（LRU 缓存，返回的图像不要关闭）"""
+        key = (doc.key, n)
+        with self._lock:
+            image = self._pages.get(key)
+            if image is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        image = self._render(doc.page_lines(n))
+        with self._lock:
+            self._pages[key] = image
+            while len(self._pages) > self.cache_pages:
+                self._pages.popitem(last=False)
+        return image
+
+    def _render(self, lines):
+        gray = Image.new("L", self.size, 255)
+        draw = ImageDraw.Draw(gray)
+        y = self.margin
+        for line in lines:
+            if line:
+                draw.text((self.margin, y), line, font=self.font, fill=0)
+            y += self.line_height
+        try:
+            return threshold(gray, self.thresh)
+        finally:
+            gray.close()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self._pages), "documents": len(self._docs)}
@@ -5,6 +5,8 @@ from PIL import ImageGrab
 import wx
 import time
 
+from modules.utils import throttle
+
 class WireManager():
     def __init__(self, size):
         self.wire = None
@@ -30,10 +32,17 @@ class WireManager():
                 finally:
                     self.wire = None
 
+    @throttle(1 / 30)
     def updateSize(self):
-        # First destroy the old window
-        self.hideWire()
-        # Then create new window with updated size
+        """按当前尺寸原地调整 wire；连续的调整请求被合并，只应用最新的尺寸"""
+        with self._lock:
+            if self.wire is not None:
+                if self.wire.resize(2*self.size.w, 2*self.size.h):
+                    return
+                # 调整失败时先销毁旧窗口，避免屏幕上留下没人管的边框
+                self.wire.destroy()
+                self.wire = None
+        # 还没有窗口（或调整失败）时新建一个
         self.showWire()
 
     def on_area_selected(self, width, height):
@@ -0,0 +1,133 @@
+import weakref
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+
+@lru_cache(maxsize=64)
+def _lut(thresh):
+    """每个阈值只构建一次的 L -> 1 查找表"""
+    return [255 if x > thresh else 0 for x in range(256)]
+
+
+def luminance(image):
+    """截图 -> 灰度图（Pillow 的 C 实现，ITU-R 601-2 权重）"""
+    if image.mode == "L":
+        return image
+    return image.convert("L")
+
+
+def threshold(gray, thresh):
+    """灰度图 -> 1-bit 图像，像素 > thresh 为白"""
+    return gray.point(_lut(thresh), "1")
+
+
+def binarize(image, thresh):
+    """截图 -> 1-bit 图像（luminance + threshold）
+
+    截图路径上和旧的 convert('L').point(lambda) 一样快（实测 x0.97，没有提速），耗时都在灰度转换；
+    程序里改为缓存灰度图后直接 threshold，这个函数只留给基准测试对照。
+    """
+    gray = luminance(image)
+    try:
+        return threshold(gray, thresh)
+    finally:
+        if gray is not image:
+            gray.close()
+
+
+def otsu_threshold(gray):
+    """Otsu 全局阈值：使类间方差最大的灰度级（直方图由 Pillow 统计，只有 256 个桶）"""
+    hist = np.asarray(gray.histogram(), dtype=np.float64)
+    levels = np.arange(256)
+    w0 = np.cumsum(hist)
+    w1 = w0[-1] - w0
+    mu0 = np.cumsum(hist * levels)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mu0[-1] * w0 - mu0 * w0[-1]) ** 2 / (w0 * w1)
+    between[~np.isfinite(between)] = 0
+    return int(np.argmax(between))
+
+
+def _block_sums(x, block):
+    """每个 block x block 块的像素和与平方和（整数运算）
+
+    先把同一块的 block 行加在一起（整行连续内存），再跨步合并列；
+    像素和用 uint16、平方和用 uint32 累加，block <= 16 时都不会溢出。
+    """
+    sq = np.square(x, dtype=np.uint16)
+    r1 = x[0::block].astype(np.uint16)
+    r2 = sq[0::block].astype(np.uint32)
+    for i in range(1, block):
+        r1 += x[i::block]
+        r2 += sq[i::block]
+    s1 = r1[:, 0::block].astype(np.uint32)
+    s2 = r2[:, 0::block].copy()
+    for i in range(1, block):
+        s1 += r1[:, i::block]
+        s2 += r2[:, i::block]
+    return s1, s2
+
+
+def _box_sum(a, n):
+    """uint32 积分图求 n x n 邻域和，边缘按最近值延伸
+
+    积分图本身会溢出回绕，但邻域和小于 2**32，按模运算相减结果仍然精确。
+    """
+    half = n // 2
+    p = np.pad(a, half, mode="edge")
+    ii = np.zeros((p.shape[0] + 1, p.shape[1] + 1), dtype=np.uint32)
+    np.cumsum(p, axis=0, dtype=np.uint32, out=ii[1:, 1:])
+    np.cumsum(ii[1:, 1:], axis=1, dtype=np.uint32, out=ii[1:, 1:])
+    return ii[n:, n:] - ii[:-n, n:] - ii[n:, :-n] + ii[:-n, :-n]
+
+
+# 最近一帧的 Sauvola 邻域统计：(weakref(gray), window, block, mean, std)
+_stats_cache = None
+
+
+def _local_stats(x, gray, window, block):
+    """块网格上的邻域均值和标准差（float32）；同一张灰度图重复二值化时直接复用"""
+    global _stats_cache
+    cached = _stats_cache
+    if cached is not None and cached[0]() is gray and cached[1:3] == (window, block):
+        return cached[3], cached[4]
+
+    s1, s2 = _block_sums(x, block)
+    n = max(window // block, 1) | 1
+    count = np.float32(n * n * block * block)
+    mean = _box_sum(s1, n) / count
+    var = _box_sum(s2, n) / count
+    var -= mean * mean
+    np.maximum(var, 0, out=var)
+    std = np.sqrt(var, out=var)
+    _stats_cache = (weakref.ref(gray), window, block, mean, std)
+    return mean, std
+
+
+def sauvola(gray, window=31, k=0.2, r=128, block=4):
+    """Sauvola 局部阈值：T = m * (1 + k * (s / r - 1))，m、s 为 window 邻域的均值和标准差
+
+    邻域统计在 block x block 的块网格上用整数积分图计算（float32 只用在块网格上），
+    每个像素和所在块的阈值比较；window 远大于 block，结果与逐像素计算几乎一致。
+    3036x1900 上新的一帧约 30-40 ms（固定阈值约 3-6 ms）；统计按灰度图缓存，
+    同一帧再次二值化（reprocess_with_thresh、调整 k、r）只需比较和打包，约 12 ms。
+    缓存按对象识别灰度图，所以灰度图不能原地修改。
+    """
+    x = np.asarray(gray)
+    h, w = x.shape
+    if h % block or w % block:
+        x = np.pad(x, ((0, -h % block), (0, -w % block)), mode="edge")
+
+    mean, std = _local_stats(x, gray, window, block)
+    t = mean * (1 + k * (std / r - 1))
+
+    # 像素是整数，x > t 等价于 x > floor(t)，用 uint8 比较更快
+    np.clip(t, 0, 255, out=t)
+    t = t.astype(np.uint8)
+    # 阈值只在列方向展开，块内的 block 行广播比较，不用把阈值图放大到原分辨率
+    H, W = x.shape
+    t = np.repeat(t, block, axis=1)
+    bits = (x.reshape(H // block, block, W) > t[:, None, :]).reshape(H, W)
+    return Image.frombytes("1", (w, h), np.packbits(bits[:h, :w], axis=1).tobytes())
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+剪贴板变化监听 - 通过 XFixes 的 SetSelectionOwnerNotify 事件得知剪贴板内容换了
+
+每次复制都会重新设置选区所有者，所以不用轮询 pyperclip.paste()（在 X11 上每次都会起一个
+xclip/xsel 子进程），只在收到事件时读取一次文本。
+"""
+
+from Xlib.ext import xfixes
+
+from modules import xdisplay
+from modules.utils import worker
+
+
+class ClipboardWatcher:
+    def __init__(self, callback, selection="CLIPBOARD"):
+        """callback() 在后台工作线程中执行，XFixes 不可用时 available 为 False，调用方应退回轮询"""
+        self.callback = callback
+        self.selection = selection
+        self.changes = 0
+        self.available = False
+
+        try:
+            d = xdisplay.get_display()
+            if not d.has_extension(xfixes.extname):
+                print("XFixes unavailable, falling back to clipboard polling")
+                return
+
+            self._atom = xdisplay.atom(selection)
+            xdisplay.on_event(xfixes.SetSelectionOwnerNotify, self._on_owner_change)
+            with xdisplay.lock:
+                d.xfixes_query_version()
+                d.xfixes_select_selection_input(d.screen().root, self._atom,
+                                                xfixes.XFixesSetSelectionOwnerNotifyMask)
+                d.flush()
+            self.available = True
+        except Exception as e:
+            print(f"Clipboard watcher unavailable, falling back to polling: {e}")
+
+    def _on_owner_change(self, event):
+        if event.selection != self._atom:
+            return
+        self.changes += 1
+        # 读取剪贴板会起子进程，不占用 X 事件线程，也不占用只跑定时器的调度线程
+        worker.submit(self.callback)
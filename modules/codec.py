@@ -0,0 +1,109 @@
+import io
+import time
+import threading
+
+
+class Codec:
+    """1-bit 帧编码器，记录每次编码的耗时和字节数"""
+
+    def __init__(self, name, ext, content_type, encode, browser=True):
+        self.name = name
+        self.ext = ext
+        self.content_type = content_type
+        self.browser = browser  # viewer 的 <img>/canvas 能否直接解码
+        self._encode = encode
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_time = 0.0
+        self.total_bytes = 0
+        self.last_time = 0.0
+        self.last_bytes = 0
+
+    def encode(self, image):
+        start = time.perf_counter()
+        data = self._encode(image)
+        cost = time.perf_counter() - start
+
+        with self._lock:
+            self.count += 1
+            self.total_time += cost
+            self.total_bytes += len(data)
+            self.last_time = cost
+            self.last_bytes = len(data)
+        return data
+
+    def stats(self):
+        count = max(self.count, 1)
+        return {
+            "codec": self.name,
+            "frames": self.count,
+            "mean_ms": self.total_time / count * 1000,
+            "mean_bytes": self.total_bytes / count,
+            "last_ms": self.last_time * 1000,
+            "last_bytes": self.last_bytes,
+        }
+
+
+def _save(format, **params):
+    def encode(image):
+        buf = io.BytesIO()
+        image.save(buf, format, **params)
+        return buf.getvalue()
+    return encode
+
+
+def _raw(image):
+    # 打包的 1-bit 位流：8 字节头（宽、高，大端）+ 每行按字节对齐的像素位
+    w, h = image.size
+    return w.to_bytes(4, "big") + h.to_bytes(4, "big") + image.tobytes()
+
+
+def _codecs():
+    codecs = [Codec("png-optimize", ".png", "image/png", _save("PNG", optimize=True))]
+    for level in range(10):
+        codecs.append(Codec(f"png-{level}", ".png", "image/png", _save("PNG", compress_level=level)))
+    codecs.append(Codec("pbm", ".pbm", "image/x-portable-bitmap", _save("PPM"), browser=False))
+    codecs.append(Codec("raw", ".bin", "application/octet-stream", _raw, browser=False))
+    return {codec.name: codec for codec in codecs}
+
+
+CODECS = _codecs()
+DEFAULT_CODEC = "png-optimize"
+
+
+def get_codec(name):
+    if name not in CODECS:
+        print(f"Unknown frame codec '{name}', using {DEFAULT_CODEC}")
+        name = DEFAULT_CODEC
+    return CODECS[name]
+
+
+def measure(images, codecs=None):
+    """对每个编码器编码一遍所有图像，返回 [{codec, mean_ms, mean_bytes}]"""
+    codecs = codecs or list(CODECS.values())
+    results = []
+    for codec in codecs:
+        total_time = 0.0
+        total_bytes = 0
+        for image in images:
+            start = time.perf_counter()
+            total_bytes += len(codec._encode(image))
+            total_time += time.perf_counter() - start
+        results.append({
+            "codec": codec.name,
+            "browser": codec.browser,
+            "mean_ms": total_time / len(images) * 1000,
+            "mean_bytes": total_bytes / len(images),
+        })
+    return results
+
+
+def score(result, link_kbps):
+    """编码时间 + 按链路带宽估算的传输时间（毫秒）"""
+    return result["mean_ms"] + result["mean_bytes"] * 8 / link_kbps
+
+
+def choose_codec(results, link_kbps):
+    """在 viewer 可解码的编码器中选择编码 + 传输总耗时最小的"""
+    candidates = [r for r in results if r["browser"]]
+    return min(candidates, key=lambda r: score(r, link_kbps))["codec"]
@@ -1,9 +1,9 @@
-import pyautogui
+from modules import xdisplay
 
 def getCursorInfo():
     try:
-        cursor = pyautogui.position()
-        return [ cursor.x, cursor.y ]
+        x, y = xdisplay.pointer()
+        return [ x, y ]
     except:
         print("oh noo...")
         pass
\ No newline at end of file
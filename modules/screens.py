@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+屏幕拓扑 - 通过 RandR 查询一次显示器布局并缓存
+
+只有收到 RandR 的屏幕/CRTC 变化事件时才重新查询；没有 RandR 时整个 root 窗口视为一个显示器。
+"""
+
+import threading
+from collections import namedtuple
+
+from Xlib.ext import randr
+
+from modules import xdisplay
+
+Monitor = namedtuple("Monitor", "x y w h primary")
+
+_lock = threading.Lock()
+_cache = None  # (root_size, [Monitor])
+_listening = False
+
+
+def _query():
+    d = xdisplay.get_display()
+    root = d.screen().root
+    geometry = root.get_geometry()
+    root_size = (geometry.width, geometry.height)
+
+    monitors = []
+    if d.has_extension("RANDR"):
+        if hasattr(root, "xrandr_get_monitors"):
+            # RandR 1.5：服务器直接给出显示器列表
+            for m in root.xrandr_get_monitors(is_active=True).monitors:
+                monitors.append(Monitor(m.x, m.y, m.width_in_pixels, m.height_in_pixels, bool(m.primary)))
+        else:
+            resources = root.xrandr_get_screen_resources()
+            primary = root.xrandr_get_output_primary().output
+            for crtc in resources.crtcs:
+                info = d.xrandr_get_crtc_info(crtc, resources.config_timestamp)
+                if info.mode and info.width and info.height:
+                    monitors.append(Monitor(info.x, info.y, info.width, info.height, primary in info.outputs))
+
+    if not monitors:
+        monitors = [Monitor(0, 0, root_size[0], root_size[1], True)]
+    return root_size, monitors
+
+
+def _invalidate(event):
+    global _cache
+    with _lock:
+        _cache = None
+
+
+def _topology():
+    global _cache, _listening
+    with _lock:
+        if _cache is None:
+            _cache = _query()
+            if not _listening:
+                _listening = True
+                _subscribe()
+        return _cache
+
+
+def _subscribe():
+    d = xdisplay.get_display()
+    if not d.has_extension("RANDR"):
+        return
+    xdisplay.on_event(randr.ScreenChangeNotify, _invalidate)
+    xdisplay.on_event(randr.CrtcChangeNotify, _invalidate)
+    with xdisplay.lock:
+        d.screen().root.xrandr_select_input(randr.RRScreenChangeNotifyMask | randr.RRCrtcChangeNotifyMask)
+        d.flush()
+
+
+def monitors():
+    return list(_topology()[1])
+
+
+def screen_size():
+    """整个 root 窗口（所有显示器拼在一起）的尺寸"""
+    return _topology()[0]
+
+
+def primary():
+    found = _topology()[1]
+    for monitor in found:
+        if monitor.primary:
+            return monitor
+    return found[0]
+
+
+def monitor_at(x, y):
+    """包含点 (x, y) 的显示器，不在任何显示器上时返回主显示器"""
+    for monitor in _topology()[1]:
+        if monitor.x <= x < monitor.x + monitor.w and monitor.y <= y < monitor.y + monitor.h:
+            return monitor
+    return primary()
+
+
+def clamp(bbox):
+    """bbox 与 root 窗口的交集，完全在屏幕外时返回 None"""
+    w, h = screen_size()
+    x0, y0, x1, y1 = bbox
+    x0, y0 = max(x0, 0), max(y0, 0)
+    x1, y1 = min(x1, w), min(y1, h)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return (x0, y0, x1, y1)
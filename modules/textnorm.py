@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+文本模式的文本整理：把从 PDF 复制出来的硬换行还原成段落，再转成 content.js
+
+- 英文：行尾连字符断开的单词接回去，行与行之间用空格连接
+- 中文（CJK）：两行首尾都是 CJK 字符时直接连接，不插空格
+- 以句末标点结尾的行、空行视为段落结束
+- 段落内容做 HTML 转义，整体用 JSON 编码成合法的 JS 字符串
+
+标点表和 CJK 区段在导入时准备好；逐行扫描一次，不对整段文本反复做正则替换。
+"""
+
+import html
+import json
+
+# 句末标点：以这些字符结尾的行保留换行（段落结束）
+_TERMINATORS = frozenset('.!?。！？：:"”」』)）')
+
+# 常用 CJK 区段：标点、假名、统一表意文字（含扩展 A）、兼容表意文字、全角字符
+_CJK_RANGES = (
+    (0x3000, 0x303F), (0x3040, 0x30FF), (0x3400, 0x4DBF),
+    (0x4E00, 0x9FFF), (0xF900, 0xFAFF), (0xFF00, 0xFFEF),
+)
+
+def is_cjk(ch):
+    code = ord(ch)
+    for lo, hi in _CJK_RANGES:
+        if lo <= code <= hi:
+            return True
+    return False
+
+
+def _joiner(prev, line):
+    """prev 行与 line 行之间的连接符；None 表示段落结束"""
+    last = prev[-1]
+    if last in _TERMINATORS:
+        return None
+    first = line[0]
+    # 英文连字符断词：exam-\nple -> example
+    if last == "-" and len(prev) > 1 and prev[-2].isalpha() and first.islower():
+        return ""
+    if is_cjk(last) and is_cjk(first):
+        return ""
+    return " "
+
+
+def paragraphs(text):
+    """逐行扫描，产出整理后的段落"""
+    parts = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            # 空行：结束当前段落
+            if parts:
+                yield "".join(parts)
+                parts = []
+            continue
+
+        if parts:
+            joiner = _joiner(parts[-1], line)
+            if joiner is None:
+                yield "".join(parts)
+                parts = []
+            elif joiner == "":
+                if parts[-1][-1] == "-":
+                    parts[-1] = parts[-1][:-1]
+            else:
+                parts.append(joiner)
+        parts.append(line)
+
+    if parts:
+        yield "".join(parts)
+
+
+def to_html(text):
+    """整理后的段落，每段一个 <p>，内容已做 HTML 转义"""
+    return "".join(f"<p>{html.escape(p, quote=False)}</p>" for p in paragraphs(text))
+
+
+def to_js(text, name="content"):
+    """生成 viewer 加载的 content.js"""
+    literal = json.dumps(to_html(text), ensure_ascii=False)
+    # JSON 允许但旧 JS 引擎不接受的行分隔符（str.replace 比对非 ASCII 文本做 translate 快得多）
+    literal = literal.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+    return f"var {name} = {literal};"
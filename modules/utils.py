@@ -1,20 +1,188 @@
+import heapq
+import itertools
+import queue
 import threading
+import time
+from functools import wraps
 
-def debounce(wait):
+
+class Scheduler:
+    """ One shared timer thread backed by a heap, instead of one threading.Timer
+        (and one OS thread) per call. Callbacks run on the scheduler thread, so
+        they should be short; hand slow work to a Worker. """
+    def __init__(self):
+        self._heap = []
+        self._cond = threading.Condition()
+        self._counter = itertools.count()
+        self._thread = None
+
+    def call_later(self, delay, fn, *args, **kwargs):
+        """ Schedule fn(*args, **kwargs) after `delay` seconds, returns a handle for cancel(). """
+        # [deadline, order, fn, args, kwargs, cancelled]
+        entry = [time.monotonic() + delay, next(self._counter), fn, args, kwargs, False]
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return entry
+
+    def cancel(self, entry):
+        with self._cond:
+            entry[5] = True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    while self._heap and self._heap[0][5]:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                entry = heapq.heappop(self._heap)
+                entry[5] = True
+
+            _, _, fn, args, kwargs, _ = entry
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                print(f"Error in scheduled call {getattr(fn, '__name__', fn)}: {e}")
+
+
+scheduler = Scheduler()
+
+
+class Worker:
+    """ One background thread that runs submitted calls in order. For work that is
+        too slow for the scheduler thread (subprocesses, rendering, file I/O). """
+    def __init__(self, name="worker"):
+        self.name = name
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, fn, *args, **kwargs):
+        """ Queue fn(*args, **kwargs) and return immediately. """
+        self._queue.put((fn, args, kwargs))
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            fn, args, kwargs = self._queue.get()
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                print(f"Error in worker call {getattr(fn, '__name__', fn)}: {e}")
+
+
+# shared worker for background jobs; the scheduler only runs timers
+worker = Worker()
+
+# name -> counters of every debounced/throttled function
+_stats = {}
+
+
+def timer_stats():
+    """ Counters for every debounced/throttled function: calls, fired, coalesced. """
+    return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def _register(fn, kind):
+    stats = {"calls": 0, "fired": 0, "coalesced": 0}
+    _stats[f"{fn.__qualname__} ({kind})"] = stats
+    return stats
+
+
+def debounce(wait, leading=False):
     """ Decorator that will postpone a functions' execution until after `wait` seconds
-        have elapsed since the last time it was invoked. """
+        have elapsed since the last time it was invoked.
+        With leading=True the first call fires immediately and further calls are
+        dropped until `wait` seconds pass without a call. """
     def decorator(fn):
-        timer = None
+        stats = _register(fn, "debounce-leading" if leading else "debounce")
+        lock = threading.Lock()
+        pending = None
+        quiet_at = 0.0
+
+        @wraps(fn)
         def debounced(*args, **kwargs):
-            nonlocal timer
-            def call_it():
-                fn(*args, **kwargs)
+            nonlocal pending, quiet_at
+            with lock:
+                stats["calls"] += 1
 
-            if timer is not None:
-                timer.cancel()
+                if leading:
+                    now = time.monotonic()
+                    fire = now >= quiet_at
+                    quiet_at = now + wait
+                    if not fire:
+                        stats["coalesced"] += 1
+                        return
+                    stats["fired"] += 1
+                else:
+                    if pending is not None and not pending[5]:
+                        scheduler.cancel(pending)
+                        stats["coalesced"] += 1
+                    pending = scheduler.call_later(wait, call_it, args, kwargs)
+                    return
 
-            timer = threading.Timer(wait, call_it)
-            timer.start()
+            fn(*args, **kwargs)
 
+        def call_it(args, kwargs):
+            with lock:
+                stats["fired"] += 1
+            fn(*args, **kwargs)
+
+        debounced.stats = stats
         return debounced
     return decorator
+
+
+def throttle(wait):
+    """ Decorator that runs a function at most once every `wait` seconds.
+        Calls inside the window are merged into one trailing call with the latest arguments. """
+    def decorator(fn):
+        stats = _register(fn, "throttle")
+        lock = threading.Lock()
+        last = -float("inf")
+        latest = None
+        pending = None
+
+        @wraps(fn)
+        def throttled(*args, **kwargs):
+            nonlocal last, latest, pending
+            with lock:
+                stats["calls"] += 1
+                now = time.monotonic()
+                if pending is None and now - last >= wait:
+                    last = now
+                    stats["fired"] += 1
+                else:
+                    if pending is None:
+                        pending = scheduler.call_later(last + wait - now, trailing)
+                    else:
+                        stats["coalesced"] += 1
+                    latest = (args, kwargs)
+                    return
+            fn(*args, **kwargs)
+
+        def trailing():
+            nonlocal last, latest, pending
+            with lock:
+                args, kwargs = latest
+                latest = pending = None
+                last = time.monotonic()
+                stats["fired"] += 1
+            fn(*args, **kwargs)
+
+        throttled.stats = stats
+        return throttled
+    return decorator
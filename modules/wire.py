@@ -1,23 +1,23 @@
 #!/usr/bin/python
 
-import Xlib.threaded
-from Xlib import X, display, Xutil
+from Xlib import X, Xutil
 from Xlib.ext import shape
-from ewmh import EWMH
 
 from modules.mouse import getCursorInfo
+from modules.xdisplay import atom, ewmh, get_display, lock
 
 
 class OutlineWindow:
     def __init__(self, display, x, y, w, h, lw=3):
         self.w = w
         self.h =h
+        self.lw = lw
 
         self.d = display
         self.screen = self.d.screen()
 
-        self.WM_DELETE_WINDOW = self.d.intern_atom('WM_DELETE_WINDOW')
-        self.WM_PROTOCOLS = self.d.intern_atom('WM_PROTOCOLS')
+        self.WM_DELETE_WINDOW = atom('WM_DELETE_WINDOW')
+        self.WM_PROTOCOLS = atom('WM_PROTOCOLS')
 
         # Creates a pixel map that will be used to draw the areas that aren't masked
         bgpm = self.screen.root.create_pixmap(1, 1, self.screen.root_depth)
@@ -30,13 +30,13 @@ class OutlineWindow:
 
         # we fill the pixel map with red
         bgpm.fill_rectangle(bggc, 0, 0, 1, 1)
-        geometry = self.screen.root.get_geometry()
 
+        # 窗口只有区域大小，合成器每次移动只需要处理这一块，而不是整个屏幕
         self.window = self.screen.root.create_window(
                 x,
                 y,
-                geometry.width, # width
-                geometry.height, # height
+                w, # width
+                h, # height
                 0, # border_width
                 self.screen.root_depth, # depth
                 X.InputOutput, # window_class
@@ -46,11 +46,38 @@ class OutlineWindow:
                 colormap=X.CopyFromParent, # attr
                 override_redirect=True # attr
         )
+        # the server keeps its own copy of the background
+        bggc.free()
+        bgpm.free()
 
         # We want to make sure we're notified of window destruction so we need to enable this protocol
         self.window.set_wm_protocols([self.WM_DELETE_WINDOW])
         self.window.set_wm_hints(flags=Xutil.StateHint, initial_state=Xutil.NormalState)
 
+        self._set_shape(w, h)
+        self.window.shape_select_input(0)
+        self.window.map()
+
+        # use the python-ewmh lib to set extended attributes on the window. Make sure to do this after
+        # calling window.map() otherwise your attributes will not be received by the window.
+        self.ewmh = ewmh()
+        with lock:
+            # Always on top
+            self.ewmh.setWmState(self.window, 1, '_NET_WM_STATE_ABOVE')
+            # Don't show the icon in the task bar
+            self.ewmh.setWmState(self.window, 1, '_NET_WM_STATE_SKIP_TASKBAR')
+
+            # Apply changes
+            display.flush()
+            display.sync()
+
+        self._destroyed = False
+        self.pos = (x, y)
+        self.moves = 0  # 实际发出的 configure 次数
+
+    def _set_shape(self, w, h):
+        lw = self.lw
+
         # Create an outer rectangle that will be the outer edge of the visible rectangle
         outer_rect = self.window.create_pixmap(w, h, 1)
         gc = outer_rect.create_gc(foreground=1, background=0)
@@ -71,24 +98,33 @@ class OutlineWindow:
         # Now subtract the inner rectangle at line width offset from the outer rect
         # This creates a red rectangular outline that can be clicked through
         self.window.shape_mask(shape.SO.Subtract, shape.SK.Bounding, lw, lw, inner_rect)
-        self.window.shape_select_input(0)
-        self.window.map()
 
-        # use the python-ewmh lib to set extended attributes on the window. Make sure to do this after
-        # calling window.map() otherwise your attributes will not be received by the window.
-        self.ewmh = EWMH(display, self.screen.root)
-        # Always on top
-        self.ewmh.setWmState(self.window, 1, '_NET_WM_STATE_ABOVE')
-        # Draw even over the task bar
-        self.ewmh.setWmState(self.window, 1, '_NET_WM_STATE_FULLSCREEN')
-        # Don't show the icon in the task bar
-        self.ewmh.setWmState(self.window, 1, '_NET_WM_STATE_SKIP_TASKBAR')
-
-        # Apply changes
-        display.flush()
-        display.sync()
+        outer_rect.free()
+        inner_rect.free()
 
-        self._destroyed = False
+    def resize(self, w, h):
+        """在现有窗口上调整大小并重新计算形状遮罩，中心保持不动
+
+        返回是否成功；失败时窗口还在，由调用方 destroy() 后重建。
+        """
+        if self._destroyed:
+            return False
+        if (w, h) == (self.w, self.h):
+            return True
+
+        try:
+            newX = self.pos[0] + self.w // 2 - w // 2
+            newY = self.pos[1] + self.h // 2 - h // 2
+            with lock:
+                self.window.configure(x=newX, y=newY, width=w, height=h, stack_mode=X.Above)
+                self._set_shape(w, h)
+                self.d.flush()
+            self.w, self.h = w, h
+            self.pos = (newX, newY)
+            return True
+        except Exception as e:
+            print(f"Error resizing outline window: {e}")
+            return False
 
     # cx, cy cursor pos
     def updatePos(self, cx, cy):
@@ -98,9 +134,15 @@ class OutlineWindow:
         try:
             newX = cx - self.w // 2
             newY = cy - self.h // 2
+            # 位置没变就不发请求
+            if (newX, newY) == self.pos:
+                return
 
-            self.window.configure(x=newX, y=newY, stack_mode=X.Above)
-            self.d.flush()
+            with lock:
+                self.window.configure(x=newX, y=newY, stack_mode=X.Above)
+                self.d.flush()
+            self.pos = (newX, newY)
+            self.moves += 1
         except Exception as e:
             # 如果窗口已被销毁，静默处理
             self._destroyed = True
@@ -110,14 +152,13 @@ class OutlineWindow:
             try:
                 # 先设置标志避免重复销毁
                 self._destroyed = True
-                # 隐藏窗口
-                self.window.unmap()
-                self.d.flush()
-                # 销毁窗口
-                self.window.destroy()
-                self.d.flush()
-                # 确保操作完成
-                self.d.sync()
+                with lock:
+                    # 隐藏窗口
+                    self.window.unmap()
+                    # 销毁窗口（连接是共享的，不关闭）
+                    self.window.destroy()
+                    # 确保操作完成
+                    self.d.sync()
             except Exception as e:
                 print(f"Error destroying outline window: {e}")
                 self._destroyed = True
@@ -142,5 +183,5 @@ def createOutlineWindow(w, h, use_cursor_pos=True):
         # 使用默认位置，让 updateRegion 循环负责位置更新
         x, y = 100, 200
     
-    instance = OutlineWindow(display.Display(), x, y, w, h)
+    instance = OutlineWindow(get_display(), x, y, w, h)
     return instance
\ No newline at end of file
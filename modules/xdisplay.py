@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+进程内共享的 Xlib 连接
+
+wire、鼠标磁铁和光标查询都通过这里的同一个长连接发请求，不再各自打开 display.Display()。
+Xlib.threaded 保证单个请求的线程安全；需要连续发出的一组请求（例如 configure + flush）
+用 `with lock:` 串行化。事件由一个后台线程读取，按事件类型分发给 on_event 注册的回调。
+"""
+
+import threading
+
+import Xlib.threaded  # noqa: F401  让 python-xlib 的请求发送线程安全
+from Xlib import display
+from ewmh import EWMH
+
+lock = threading.RLock()
+
+_display = None
+_ewmh = None
+_atoms = {}
+_handlers = {}  # 事件类 -> [handler]
+_event_thread = None
+
+
+def get_display():
+    """返回共享连接，第一次调用时打开"""
+    global _display
+    with lock:
+        if _display is None:
+            _display = display.Display()
+        return _display
+
+
+def root():
+    return get_display().screen().root
+
+
+def atom(name):
+    """缓存的 intern_atom，同名 atom 只往返一次"""
+    value = _atoms.get(name)
+    if value is None:
+        with lock:
+            value = _atoms[name] = get_display().intern_atom(name)
+    return value
+
+
+def ewmh():
+    global _ewmh
+    with lock:
+        if _ewmh is None:
+            d = get_display()
+            _ewmh = EWMH(d, d.screen().root)
+        return _ewmh
+
+
+def on_event(event_class, handler):
+    """注册事件回调，handler(event) 在事件线程中执行，应尽快返回"""
+    global _event_thread
+    with lock:
+        _handlers.setdefault(event_class, []).append(handler)
+        if _event_thread is None:
+            _event_thread = threading.Thread(target=_event_loop, args=(get_display(),),
+                                             name="x-events", daemon=True)
+            _event_thread.start()
+
+
+def _event_loop(d):
+    while True:
+        try:
+            event = d.next_event()
+        except Exception:
+            # 连接已关闭
+            return
+        for handler in _handlers.get(type(event), ()):
+            try:
+                handler(event)
+            except Exception as e:
+                print(f"Error in X event handler {getattr(handler, '__name__', handler)}: {e}")
+
+
+def pointer():
+    """当前鼠标的屏幕坐标"""
+    reply = root().query_pointer()
+    return reply.root_x, reply.root_y
+
+
+def warp(x, y):
+    """把鼠标移动到屏幕坐标 (x, y)"""
+    with lock:
+        root().warp_pointer(int(x), int(y))
+        get_display().flush()
+
+
+def close():
+    global _display, _ewmh, _event_thread
+    with lock:
+        if _display is not None:
+            try:
+                _display.close()
+            except Exception as e:
+                print(f"Error closing X display: {e}")
+        _display = None
+        _ewmh = None
+        _event_thread = None
+        _atoms.clear()
+        _handlers.clear()
@@ -7,8 +7,9 @@
 import time
 import math
 import threading
-from pynput import mouse
-import tkinter as tk
+from modules import xdisplay
+from modules import screens
+from modules.utils import scheduler
 
 
 class MouseMagnet:
@@ -24,10 +25,10 @@ class MouseMagnet:
         初始化鼠标磁铁
         
         Args:
-            magnet_positions: 磁铁X轴位置列表，如果为None则使用屏幕中心
+            magnet_positions: 磁铁X轴位置列表，如果为None则使用主显示器中心
             magnet_radius: 磁力作用半径（像素）
             force_strength: 磁力强度（0-1之间）
-            update_interval: 更新间隔（秒）
+            update_interval: 死区外逐步吸引时每一步的间隔（秒）
             capture_mode_check: 检查是否为捕获模式的回调函数
             dead_zone: 死区范围（像素），在此范围内鼠标X轴完全锁定
         """
@@ -36,19 +37,26 @@ class MouseMagnet:
         self.update_interval = update_interval
         self.running = False
         self.paused = False  # 新增暂停状态
-        self.mouse_controller = mouse.Controller()
         self.capture_mode_check = capture_mode_check
         self.dead_zone = dead_zone
         self.scroll_pause_time = 0
         self.scroll_pause_duration = 0.5  # 滚轮操作后暂停磁力0.5秒
         self.mouse_listener = None
-        
-        # 获取单个显示器尺寸
-        self.screen_width = self._get_screen_width()
+
+        # 由鼠标移动事件驱动；只有在死区外逐步吸引时才会安排后续的一步
+        self._lock = threading.Lock()
+        self._last_warp = None
+        self._pending = None
+
+        # 统计
+        self.events = 0
+        self.warps = 0
+        self.cpu_time = 0.0
         
         # 设置磁铁X轴位置列表
         if magnet_positions is None:
-            self.magnet_positions = [self.screen_width // 2]
+            screen = screens.primary()
+            self.magnet_positions = [screen.x + screen.w // 2]
         else:
             self.magnet_positions = magnet_positions.copy()
         
@@ -57,36 +65,6 @@ class MouseMagnet:
         print(f"磁力强度: {self.force_strength}")
         print(f"死区范围: {self.dead_zone}px")
     
-    def _get_screen_width(self):
-        """获取单个显示器宽度"""
-        root = tk.Tk()
-        root.withdraw()
-        
-        try:
-            import subprocess
-            result = subprocess.run(['xrandr'], capture_output=True, text=True)
-            lines = result.stdout.split('\n')
-            for line in lines:
-                if ' connected primary' in line or (' connected' in line and 'primary' not in result.stdout):
-                    parts = line.split()
-                    for part in parts:
-                        if 'x' in part and part.replace('x', '').replace('+', '').replace('-', '').isdigit():
-                            width = int(part.split('x')[0])
-                            if 800 <= width <= 4000:
-                                root.destroy()
-                                return width
-                    break
-            else:
-                raise Exception("无法从xrandr获取分辨率")
-        except:
-            total_width = root.winfo_screenwidth()
-            if total_width > 3000:
-                width = 1920
-            else:
-                width = total_width
-            root.destroy()
-            return width
-    
     def add_magnet_position(self, x):
         """添加磁铁X轴位置"""
         if x not in self.magnet_positions:
@@ -127,7 +105,7 @@ class MouseMagnet:
     
     def get_current_mouse_x(self):
         """获取当前鼠标X轴位置"""
-        return self.mouse_controller.position[0]
+        return xdisplay.pointer()[0]
     
     def calculate_distance(self, x1, y1, x2, y2):
         """计算两点间距离"""
@@ -137,8 +115,44 @@ class MouseMagnet:
         """滚轮事件处理，暂停磁力效果"""
         self.scroll_pause_time = time.time()
     
-    def apply_magnet_force(self):
-        """应用磁铁效果（仅X轴，仅使用第一个磁铁位置）"""
+    def on_move(self, x, y):
+        """鼠标移动事件（由主程序或本模块的监听器转发）"""
+        if not self.running or self.paused or not self.magnet_positions:
+            return
+        if (x, y) == self._last_warp:
+            # 自己 warp 产生的回声事件
+            self._last_warp = None
+            return
+        self.events += 1
+        self._step(x, y)
+
+    def _follow(self):
+        self._pending = None
+        if self.running:
+            self._step(*xdisplay.pointer())
+
+    def _step(self, x, y):
+        start = time.thread_time()
+        with self._lock:
+            target = self.apply_magnet_force(x, y)
+            if target is not None:
+                # 还在死区外：按 update_interval 继续吸引，直到进入死区或鼠标移出作用范围
+                if self._pending is not None:
+                    scheduler.cancel(self._pending)
+                self._pending = scheduler.call_later(self.update_interval, self._follow)
+        self.cpu_time += time.thread_time() - start
+
+    def _warp(self, x, y):
+        x, y = int(round(x)), int(round(y))
+        self._last_warp = (x, y)
+        xdisplay.warp(x, y)
+        self.warps += 1
+
+    def apply_magnet_force(self, current_x, current_y):
+        """应用磁铁效果（仅X轴，仅使用第一个磁铁位置）
+
+        只在计算出的位置确实变化时 warp；仍在死区外需要继续吸引时返回新位置，否则返回 None。
+        """
         if not self.magnet_positions:
             return
         
@@ -154,9 +168,6 @@ class MouseMagnet:
         if time.time() - self.scroll_pause_time < self.scroll_pause_duration:
             return
         
-        current_pos = self.mouse_controller.position
-        current_x, current_y = current_pos
-        
         # 仅使用第一个磁铁位置
         active_magnet = self.magnet_positions[0]
         distance = abs(current_x - active_magnet)
@@ -165,8 +176,9 @@ class MouseMagnet:
         if distance < self.magnet_radius:
             # 死区机制：在死区范围内完全锁定X轴位置
             if distance <= self.dead_zone:
-                # 完全锁定在磁铁位置
-                self.mouse_controller.position = (active_magnet, current_y)
+                # 完全锁定在磁铁位置，已经在磁铁上时什么都不做
+                if current_x != active_magnet:
+                    self._warp(active_magnet, current_y)
             else:
                 # 在死区外应用磁力
                 # 计算磁力强度（距离越近，磁力越强）
@@ -182,25 +194,15 @@ class MouseMagnet:
                 new_y = current_y  # Y轴保持不变
                 
                 # 移动鼠标
-                self.mouse_controller.position = (new_x, new_y)
-    
-    def magnet_loop(self):
-        """磁铁效果主循环"""
-        while self.running:
-            try:
-                self.apply_magnet_force()
-                time.sleep(self.update_interval)
-            except Exception as e:
-                print(f"磁铁效果错误: {e}")
-                break
-    
+                if int(round(new_x)) != current_x:
+                    self._warp(new_x, new_y)
+                    return self._last_warp
+
     def start(self):
         """启动磁铁效果"""
         if not self.running:
             self.running = True
-            # 不再启动独立的鼠标监听器，由主程序处理滚动事件
-            self.magnet_thread = threading.Thread(target=self.magnet_loop, daemon=True)
-            self.magnet_thread.start()
+            # 不再轮询鼠标位置，由主程序转发移动和滚动事件
             print("鼠标磁铁效果已启动")
             print("按 Ctrl+C 退出")
     
@@ -229,21 +231,35 @@ class MouseMagnet:
     def stop(self):
         """停止磁铁效果"""
         self.running = False
+        if self._pending is not None:
+            scheduler.cancel(self._pending)
+            self._pending = None
         print("鼠标磁铁效果已停止")
 
+    def stats(self):
+        """移动事件数、warp 次数和处理事件消耗的 CPU 时间"""
+        return {
+            "events": self.events,
+            "warps": self.warps,
+            "cpu_ms": self.cpu_time * 1000,
+        }
+
 
 def main():
     # 创建磁铁实例
     magnet = MouseMagnet(
         magnet_radius=200,    # 磁力半径200像素
         force_strength=0.3,   # 磁力强度30%
-        update_interval=0.008, # 8ms更新一次，保证流畅
+        update_interval=0.008, # 死区外每8ms吸引一步，保证流畅
         dead_zone=30          # 死区范围30像素
     )
     
     try:
-        # 启动磁铁效果
+        # 启动磁铁效果，单独运行时自己监听鼠标事件
         magnet.start()
+        from pynput import mouse
+        magnet.mouse_listener = mouse.Listener(on_move=magnet.on_move, on_scroll=magnet.on_scroll)
+        magnet.mouse_listener.start()
         
         # 保持程序运行
         while True:
@@ -252,6 +268,7 @@ def main():
     except KeyboardInterrupt:
         print("\n正在退出...")
         magnet.stop()
+        print(magnet.stats())
         print("程序已退出")
 
 